@@ -1,26 +1,157 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.runnables import RunnableLambda
 import logging
 import os
 import asyncio
+import string
+import httpx
+import openai
+from ..ratelimit import llm_rate_limiter
+from ..llm_cache import LLM_CACHE_ENABLED, llm_cache
+from .. import json_compat
 
 logger = logging.getLogger(__name__)
 
+# Retries for rate limits (429), 5xx, timeouts and connection errors. The OpenAI SDK
+# backs off exponentially with jitter and honors Retry-After, so a transient error
+# no longer drops a slide straight to its fallback result.
+LLM_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+
+# Size of the connection pool shared by all agents and decks
+LLM_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "64"))
+
+# Structured Outputs (response_format json_schema): "1"/"0" force it on/off, "auto"
+# guesses from the model name. OpenAI-compatible servers (OPENAI_BASE_URL) and some
+# dated snapshots reject it even when the name looks current; agents then switch to
+# plain JSON mode after the first rejection anyway.
+OPENAI_JSON_SCHEMA = os.getenv("OPENAI_JSON_SCHEMA", "auto")
+
+# Set once the API has rejected a json_schema response_format; shared by every agent
+_json_schema_rejected = False
+
+# HTTP/2 multiplexes concurrent LLM calls over one connection; httpx needs the
+# optional h2 package for it, so fall back to HTTP/1.1 keep-alive without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# One keep-alive connection pool shared by every agent, so each LLM call reuses
+# an open TLS connection instead of paying a fresh handshake per agent client.
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+async def _throttle(request: httpx.Request) -> None:
+    await llm_rate_limiter.acquire()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared async HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(600.0, connect=5.0),  # same as the OpenAI SDK default
+            # Keep idle connections longer than httpx's 5s default so they survive the
+            # gaps between pipeline stages and between decks
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=min(32, LLM_MAX_CONNECTIONS),
+                keepalive_expiry=60.0,
+            ),
+            # Every LLM request (including SDK retries) goes through the shared rate limiter
+            event_hooks={"request": [_throttle]} if llm_rate_limiter else {},
+        )
+    return _http_client
+
+
+async def prewarm_http_client() -> None:
+    """Open a connection to the OpenAI API ahead of the first LLM call (called on app startup)."""
+    base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    try:
+        response = await get_http_client().head(base_url, timeout=5.0)
+        logger.info(f"HTTP client pre-warmed ({response.http_version})")
+    except Exception as e:
+        logger.warning(f"HTTP client pre-warm failed: {e}")
+
+
+def compile_template(template: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Split a str.format template into literal chunks and placeholder names, once.
+    render_template() then only has to interleave them instead of re-parsing the template.
+    """
+    literals, keys = [], []
+    pending = ""
+    for literal, field, format_spec, conversion in string.Formatter().parse(template):
+        # Escaped braces ({{ }}) come back as extra literal-only chunks; merge them
+        pending += literal
+        if field is None:
+            continue
+        if format_spec or conversion:
+            raise ValueError(f"Unsupported placeholder {{{field}}} in prompt template")
+        literals.append(pending)
+        keys.append(field)
+        pending = ""
+    literals.append(pending)
+    return tuple(literals), tuple(keys)
+
+
+def render_template(compiled: Tuple[Tuple[str, ...], Tuple[str, ...]], values: Dict[str, Any]) -> str:
+    """Fill a compiled template (equivalent to template.format(**values))."""
+    literals, keys = compiled
+    parts = [literals[0]]
+    for key, literal in zip(keys, literals[1:]):
+        parts.append(str(values[key]))
+        parts.append(literal)
+    return "".join(parts)
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (called on app shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 class BaseAgent(ABC):
     """Base class for all PPT generation agents."""
     
     def __init__(self, model_name: str = "gpt-4-turbo-preview"):
+        self.model_name = os.getenv("OPENAI_MODEL", model_name)
+        self.parser = JsonOutputParser()
+        
+        # System/user prompts are static per agent, so the prompt and chain are
+        # built once here instead of being re-parsed on every process() call.
+        # The system prompt has no placeholders and is sent verbatim; keeping it
+        # byte-identical across calls also lets OpenAI's automatic prompt caching
+        # reuse the prefix. The user template is precompiled into literal chunks.
+        self._system_message = SystemMessage(content=self.get_system_prompt())
+        self._user_template = compile_template(self.get_user_prompt_template())
+        self.prompt = RunnableLambda(self._build_messages)
+        self._build_chain()
+    
+    def _build_chain(self):
+        """(Re)build the LLM client and chain for the current response_format."""
+        response_format = self.get_response_format()
+        self._uses_json_schema = response_format.get("type") == "json_schema"
         self.llm = ChatOpenAI(
-            model_name=os.getenv("OPENAI_MODEL", model_name),
+            model_name=self.model_name,
             temperature=self.get_temperature(),
             max_tokens=self.get_max_tokens(),
             api_key=os.getenv("OPENAI_API_KEY"),
-            model_kwargs={"response_format": {"type": "json_object"}}
+            http_async_client=get_http_client(),
+            max_retries=LLM_MAX_RETRIES,
+            model_kwargs={"response_format": response_format}
         )
-        self.parser = JsonOutputParser()
+        self.chain = self.prompt | self.llm | self.parser
+    
+    def _build_messages(self, values: Dict[str, Any]) -> List[BaseMessage]:
+        return [self._system_message, HumanMessage(content=render_template(self._user_template, values))]
     
     @abstractmethod
     def get_temperature(self) -> float:
@@ -42,34 +173,125 @@ class BaseAgent(ABC):
         """Template for user prompt."""
         pass
     
+    def get_response_format(self) -> Dict[str, Any]:
+        """OpenAI response_format for this agent (plain JSON mode by default)."""
+        return {"type": "json_object"}
+    
+    def supports_json_schema(self) -> bool:
+        """Whether the configured model accepts response_format json_schema (Structured Outputs)."""
+        if OPENAI_JSON_SCHEMA in ("0", "1"):
+            return OPENAI_JSON_SCHEMA == "1"
+        if _json_schema_rejected:
+            return False
+        legacy = self.model_name == "gpt-4" or self.model_name.startswith(("gpt-3.5", "gpt-4-"))
+        return not legacy
+    
+    def _use_json_mode_after(self, error: Exception) -> bool:
+        """
+        If error is the API rejecting json_schema, switch every agent to plain JSON
+        mode and rebuild this agent's chain. Returns whether the call should be retried.
+        """
+        global _json_schema_rejected
+        if not self._uses_json_schema or not isinstance(error, openai.BadRequestError):
+            return False
+        if "json_schema" not in str(error) and "response_format" not in str(error):
+            return False
+        if not _json_schema_rejected:
+            logger.warning(f"json_schema response_format rejected for {self.model_name}; using JSON mode")
+        _json_schema_rejected = True
+        self._build_chain()
+        return not self._uses_json_schema
+    
+    def _sync_response_format(self):
+        """Pick up a json_schema rejection seen by another agent before calling the API."""
+        if self._uses_json_schema and _json_schema_rejected:
+            self._build_chain()
+    
     @abstractmethod
     def get_fallback_result(self, **kwargs) -> Dict[str, Any]:
         """Fallback result if processing fails."""
         pass
     
+    def _cache_key(self, kwargs: Dict[str, Any]) -> Optional[str]:
+        """LLM cache key for a call (None when LLM_CACHE is off)."""
+        if not LLM_CACHE_ENABLED:
+            return None
+        messages = [message.content for message in self._build_messages(kwargs)]
+        return llm_cache.make_key(
+            self.model_name, self.get_temperature(), self.llm.model_kwargs["response_format"], messages
+        )
+    
+    async def _cache_get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if key is None:
+            return None
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is None:
+            return None
+        logger.debug(f"{self.__class__.__name__}: LLM cache hit")
+        return json_compat.loads(cached)
+    
+    async def _cache_put(self, key: Optional[str], result: Any):
+        # Fallback results never get here, so a failed call is retried next time
+        if key is not None and result is not None:
+            await asyncio.to_thread(llm_cache.put, key, json_compat.dumps(result))
+    
     async def process(self, **kwargs) -> Dict[str, Any]:
         """Main processing method - Single Item."""
+        self._sync_response_format()
         try:
-            system_prompt = self.get_system_prompt()
-            user_prompt_template = self.get_user_prompt_template()
-            
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", system_prompt),
-                ("user", user_prompt_template),
-            ])
-            
-            chain = prompt | self.llm | self.parser
-            response = await chain.ainvoke(kwargs)
+            key = self._cache_key(kwargs)
+            cached = await self._cache_get(key)
+            if cached is not None:
+                return cached
+            response = await self.chain.ainvoke(kwargs)
             logger.info(f"{self.__class__.__name__} processed successfully")
+            await self._cache_put(key, response)
             return response
             
         except Exception as e:
+            if self._use_json_mode_after(e):
+                return await self.process(**kwargs)
             logger.error(f"Error in {self.__class__.__name__}: {str(e)}")
             return self.get_fallback_result(**kwargs)
 
-    async def process_batch(self, items_kwargs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Process a batch of items concurrently."""
-        tasks = [self.process(**kwargs) for kwargs in items_kwargs]
+    async def process_stream(self, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of process().
+        Yields the partially parsed JSON object as tokens arrive; the last value
+        yielded is the complete result (or the fallback result on error).
+        """
+        self._sync_response_format()
+        started = False
+        try:
+            key = self._cache_key(kwargs)
+            cached = await self._cache_get(key)
+            if cached is not None:
+                yield cached
+                return
+            partial = None
+            async for partial in self.chain.astream(kwargs):
+                started = True
+                yield partial
+            logger.info(f"{self.__class__.__name__} streamed successfully")
+            await self._cache_put(key, partial)
+            
+        except Exception as e:
+            if not started and self._use_json_mode_after(e):
+                async for partial in self.process_stream(**kwargs):
+                    yield partial
+                return
+            logger.error(f"Error in {self.__class__.__name__}: {str(e)}")
+            yield self.get_fallback_result(**kwargs)
+
+    async def process_batch(self, items_kwargs: List[Dict[str, Any]], max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """Process a batch of items concurrently (at most max_concurrency in flight)."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _bounded(kwargs):
+            async with semaphore:
+                return await self.process(**kwargs)
+        
+        tasks = [_bounded(kwargs) for kwargs in items_kwargs]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         valid_results = []
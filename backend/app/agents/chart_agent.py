@@ -1,17 +1,115 @@
 import logging
-import json
 import os
 import base64
+import asyncio
+import traceback
 from typing import List, Dict, Optional
 from openai import AsyncOpenAI
+from .base_agent import get_http_client, LLM_MAX_RETRIES
+from .. import json_compat
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import numpy as np
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Set the chart style once at import (try modern seaborn style, fallback to default).
+# Charts render in worker threads, so global pyplot state must not change per chart.
+for _style in ('seaborn-v0_8-darkgrid', 'seaborn-darkgrid'):
+    try:
+        plt.style.use(_style)
+        break
+    except Exception:
+        pass  # Use default style
+
+# Max chart-analysis LLM calls in flight per deck
+CHART_MAX_CONCURRENCY = 8
+
+# Title/content words that make a slide a good candidate for a forced chart
+CHART_KEYWORDS = (
+    "data", "statistics", "market", "growth", "trend", "comparison",
+    "analysis", "result", "performance", "overview", "summary",
+    "数据", "统计", "市场", "增长", "趋势", "对比", "分析", "结果", "表现"
+)
+
+# Static, so it is built once and is byte-identical across calls (cacheable prefix)
+CHART_SYSTEM_PROMPT = """You are an expert at identifying data visualization opportunities in slide content.
+
+Analyze the slide content and determine if it would benefit from a chart visualization.
+
+**IMPORTANT:** If the slide topic suggests data visualization (like "market share", "trends", "comparison", "statistics")
+but doesn't contain actual numbers, you should GENERATE realistic sample data to illustrate the concept.
+
+Return JSON in this format:
+{
+    "has_data": true/false,
+    "chart_type": "bar" | "line" | "pie" | "area" | "scatter",
+    "title": "Chart title",
+    "data": {
+        "labels": ["Label 1", "Label 2", ...],
+        "values": [10, 20, ...],
+        "series": [{"name": "Series 1", "values": [...]}]  // For multi-series charts
+    },
+    "reasoning": "Why this chart type is appropriate"
+}
+
+Chart type guidelines:
+- **bar**: Comparing categories, rankings, discrete comparisons
+- **line**: Trends over time, continuous progression
+- **pie**: Part-to-whole relationships, percentages, market share
+- **area**: Cumulative totals over time
+- **scatter**: Correlation between two variables
+
+**When to generate sample data:**
+- Slide mentions "market share", "占比", "percentage" → Generate pie chart with sample percentages
+- Slide mentions "trends", "growth", "趋势" → Generate line chart with time series
+- Slide mentions "comparison", "对比" → Generate bar chart with comparative values
+- Slide mentions "statistics", "数据" → Generate appropriate chart with sample numbers
+
+Consider the audience (given with the slide) when deciding complexity.
+
+If the topic has NO relation to data or visualization, return: {"has_data": false}
+"""
+
+# Chart palettes per template
+CHART_COLOR_SCHEMES = {
+    "corporate": {
+        "primary": "#0066CC",
+        "series": ["#0066CC", "#4CAF50", "#FF9800", "#E91E63", "#9C27B0"]
+    },
+    "academic": {
+        "primary": "#333333",
+        "series": ["#333333", "#666666", "#999999", "#2196F3", "#4CAF50"]
+    },
+    "startup": {
+        "primary": "#9B59B6",
+        "series": ["#9B59B6", "#3498DB", "#E74C3C", "#F39C12", "#1ABC9C"]
+    },
+    "minimal": {
+        "primary": "#000000",
+        "series": ["#000000", "#555555", "#888888", "#AAAAAA", "#CCCCCC"]
+    },
+    "creative": {
+        "primary": "#FF6B6B",
+        "series": ["#FF6B6B", "#4ECDC4", "#FFE66D", "#A8E6CF", "#FFB6B9"]
+    },
+    "nature": {
+        "primary": "#27AE60",
+        "series": ["#27AE60", "#2ECC71", "#16A085", "#1ABC9C", "#52BE80"]
+    },
+    "futuristic": {
+        "primary": "#3498DB",
+        "series": ["#3498DB", "#9B59B6", "#E74C3C", "#1ABC9C", "#F39C12"]
+    },
+    "luxury": {
+        "primary": "#D4AF37",
+        "series": ["#D4AF37", "#C0C0C0", "#CD7F32", "#000000", "#4A4A4A"]
+    }
+}
+
 
 class ChartAgent:
     """
@@ -27,7 +125,11 @@ class ChartAgent:
     """
 
     def __init__(self):
-        self.openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.openai_client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=get_http_client(),
+            max_retries=LLM_MAX_RETRIES
+        )
         # Create charts directory
         self.charts_dir = Path(__file__).resolve().parent.parent.parent / "output" / "charts"
         self.charts_dir.mkdir(parents=True, exist_ok=True)
@@ -51,16 +153,30 @@ class ChartAgent:
         best_candidate_idx = None
         best_candidate_score = 0
 
+        # Analyze all non-title slides concurrently; each analysis is an independent LLM call.
+        # Each chart is rendered as soon as its analysis arrives, overlapping rendering with
+        # the analyses still in flight; each render runs in a worker thread on a standalone
+        # Figure, so it doesn't block the event loop.
+        semaphore = asyncio.Semaphore(CHART_MAX_CONCURRENCY)
+
+        async def _bounded_extract(i: int):
+            async with semaphore:
+                logger.info(f"Analyzing slide {i}: {slides[i].get('title')}")
+                return i, await self._extract_chart_data(slides[i], audience)
+
+        candidate_indices = []
         for i, slide in enumerate(slides):
             # Skip title slides
             if slide.get("slideType") == "title":
                 logger.info(f"Skipping title slide {i}: {slide.get('title')}")
                 continue
+            candidate_indices.append(i)
 
-            logger.info(f"Analyzing slide {i}: {slide.get('title')}")
-
+        no_chart_indices = []
+        for next_done in asyncio.as_completed([_bounded_extract(i) for i in candidate_indices]):
             # Check if slide has data suitable for visualization
-            chart_data = await self._extract_chart_data(slide, audience)
+            i, chart_data = await next_done
+            slide = slides[i]
 
             if chart_data:
                 logger.info(f"Found chart data for slide {i}: {chart_data.get('chart_type')}")
@@ -81,23 +197,23 @@ class ChartAgent:
                     logger.warning(f"Failed to generate chart for slide {i}")
             else:
                 logger.info(f"No chart data found for slide {i}: {slide.get('title')}")
-                # 记录最佳候选幻灯片（用于保底生成图表）
-                title = slide.get("title", "").lower()
-                content = slide.get("content", [])
-                score = 0
-                # 根据标题和内容评估适合生成图表的程度
-                chart_keywords = ["data", "statistics", "market", "growth", "trend", "comparison", 
-                                  "analysis", "result", "performance", "overview", "summary",
-                                  "数据", "统计", "市场", "增长", "趋势", "对比", "分析", "结果", "表现"]
-                for kw in chart_keywords:
-                    if kw in title:
-                        score += 2
-                    for c in content:
-                        if kw in c.lower():
-                            score += 1
-                if score > best_candidate_score:
-                    best_candidate_score = score
-                    best_candidate_idx = i
+                no_chart_indices.append(i)
+
+        # 记录最佳候选幻灯片（用于保底生成图表）, in slide order so ties go to the earliest slide
+        for i in sorted(no_chart_indices):
+            slide = slides[i]
+            title = slide.get("title", "").lower()
+            # 每条内容只转一次小写，而不是每个关键词都转一次
+            content = [c.lower() for c in slide.get("content", [])]
+            score = 0
+            # 根据标题和内容评估适合生成图表的程度（子串匹配：中文关键词没有词边界）
+            for kw in CHART_KEYWORDS:
+                if kw in title:
+                    score += 2
+                score += sum(kw in c for c in content)
+            if score > best_candidate_score:
+                best_candidate_score = score
+                best_candidate_idx = i
 
         # 如果没有生成任何图表，强制为最佳候选生成一个
         if charts_generated == 0 and best_candidate_idx is not None:
@@ -168,55 +284,18 @@ class ChartAgent:
             return await self._table_to_chart_data(table, title)
 
         # Build context for LLM
-        slide_text = f"Title: {title}\n"
+        slide_text = f"Audience: {audience}\nTitle: {title}\n"
         if content:
             slide_text += "Points:\n" + "\n".join(f"- {point}" for point in content)
         if paragraph:
             slide_text += f"\nDetails: {paragraph}"
 
-        system_prompt = f"""You are an expert at identifying data visualization opportunities in slide content.
-
-Analyze the slide content and determine if it would benefit from a chart visualization.
-
-**IMPORTANT:** If the slide topic suggests data visualization (like "market share", "trends", "comparison", "statistics")
-but doesn't contain actual numbers, you should GENERATE realistic sample data to illustrate the concept.
-
-Return JSON in this format:
-{{
-    "has_data": true/false,
-    "chart_type": "bar" | "line" | "pie" | "area" | "scatter",
-    "title": "Chart title",
-    "data": {{
-        "labels": ["Label 1", "Label 2", ...],
-        "values": [10, 20, ...],
-        "series": [{{"name": "Series 1", "values": [...]}}]  // For multi-series charts
-    }},
-    "reasoning": "Why this chart type is appropriate"
-}}
-
-Chart type guidelines:
-- **bar**: Comparing categories, rankings, discrete comparisons
-- **line**: Trends over time, continuous progression
-- **pie**: Part-to-whole relationships, percentages, market share
-- **area**: Cumulative totals over time
-- **scatter**: Correlation between two variables
-
-**When to generate sample data:**
-- Slide mentions "market share", "占比", "percentage" → Generate pie chart with sample percentages
-- Slide mentions "trends", "growth", "趋势" → Generate line chart with time series
-- Slide mentions "comparison", "对比" → Generate bar chart with comparative values
-- Slide mentions "statistics", "数据" → Generate appropriate chart with sample numbers
-
-Consider the {audience} audience when deciding complexity.
-
-If the topic has NO relation to data or visualization, return: {{"has_data": false}}
-"""
 
         try:
             response = await self.openai_client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": CHART_SYSTEM_PROMPT},
                     {"role": "user", "content": slide_text}
                 ],
                 temperature=0.3,
@@ -224,7 +303,7 @@ If the topic has NO relation to data or visualization, return: {{"has_data": fal
                 response_format={"type": "json_object"}
             )
 
-            result = json.loads(response.choices[0].message.content)
+            result = json_compat.loads(response.choices[0].message.content)
 
             logger.info(f"LLM analysis result: has_data={result.get('has_data')}, chart_type={result.get('chart_type')}")
 
@@ -238,7 +317,6 @@ If the topic has NO relation to data or visualization, return: {{"has_data": fal
 
         except Exception as e:
             logger.error(f"Error extracting chart data: {e}")
-            import traceback
             logger.error(traceback.format_exc())
             return None
 
@@ -307,17 +385,19 @@ If the topic has NO relation to data or visualization, return: {{"has_data": fal
         # Get template colors
         colors = self._get_template_colors(template)
 
-        try:
-            fig, ax = plt.subplots(figsize=(10, 6))
+        chart_filename = f"chart_slide_{slide_index}_{chart_type}.png"
+        chart_path = self.charts_dir / chart_filename
+        # Drawing and PNG encoding are blocking; keep them off the event loop
+        return await asyncio.to_thread(self._render_chart, chart_type, data, chart_title, colors, chart_path)
 
-            # Set style (try modern seaborn style, fallback to default)
-            try:
-                plt.style.use('seaborn-v0_8-darkgrid')
-            except:
-                try:
-                    plt.style.use('seaborn-darkgrid')
-                except:
-                    pass  # Use default style
+    def _render_chart(self, chart_type: str, data: Dict, chart_title: str, colors: Dict, chart_path: Path) -> Optional[str]:
+        """
+        Draw and save one chart. Uses a standalone Figure (not pyplot's global
+        figure manager) so charts from different decks can render concurrently.
+        """
+        try:
+            fig = Figure(figsize=(10, 6))
+            ax = fig.subplots()
 
             if chart_type == "bar":
                 self._create_bar_chart(ax, data, chart_title, colors)
@@ -334,18 +414,14 @@ If the topic has NO relation to data or visualization, return: {{"has_data": fal
                 self._create_bar_chart(ax, data, chart_title, colors)
 
             # Save chart
-            chart_filename = f"chart_slide_{slide_index}_{chart_type}.png"
-            chart_path = self.charts_dir / chart_filename
-            plt.tight_layout()
-            plt.savefig(chart_path, dpi=150, bbox_inches='tight', facecolor='white')
-            plt.close(fig)
+            fig.tight_layout()
+            fig.savefig(chart_path, dpi=150, bbox_inches='tight', facecolor='white')
 
             logger.info(f"Chart saved: {chart_path}")
             return str(chart_path)
 
         except Exception as e:
             logger.error(f"Failed to generate chart: {e}")
-            plt.close('all')  # Clean up
             return None
 
     def _create_bar_chart(self, ax, data: Dict, title: str, colors: Dict):
@@ -370,7 +446,7 @@ If the topic has NO relation to data or visualization, return: {{"has_data": fal
             # Single series
             values = data.get("values", [])
             ax.bar(labels, values, color=colors["primary"])
-            plt.xticks(rotation=45, ha='right')
+            plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
 
         ax.set_title(title, fontsize=14, fontweight='bold')
         ax.grid(axis='y', alpha=0.3)
@@ -392,7 +468,7 @@ If the topic has NO relation to data or visualization, return: {{"has_data": fal
 
         ax.set_title(title, fontsize=14, fontweight='bold')
         ax.grid(True, alpha=0.3)
-        plt.xticks(rotation=45, ha='right')
+        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
 
     def _create_pie_chart(self, ax, data: Dict, title: str, colors: Dict):
         """Create pie chart."""
@@ -443,39 +519,4 @@ If the topic has NO relation to data or visualization, return: {{"has_data": fal
 
     def _get_template_colors(self, template: str) -> Dict:
         """Get color scheme for template."""
-        color_schemes = {
-            "corporate": {
-                "primary": "#0066CC",
-                "series": ["#0066CC", "#4CAF50", "#FF9800", "#E91E63", "#9C27B0"]
-            },
-            "academic": {
-                "primary": "#333333",
-                "series": ["#333333", "#666666", "#999999", "#2196F3", "#4CAF50"]
-            },
-            "startup": {
-                "primary": "#9B59B6",
-                "series": ["#9B59B6", "#3498DB", "#E74C3C", "#F39C12", "#1ABC9C"]
-            },
-            "minimal": {
-                "primary": "#000000",
-                "series": ["#000000", "#555555", "#888888", "#AAAAAA", "#CCCCCC"]
-            },
-            "creative": {
-                "primary": "#FF6B6B",
-                "series": ["#FF6B6B", "#4ECDC4", "#FFE66D", "#A8E6CF", "#FFB6B9"]
-            },
-            "nature": {
-                "primary": "#27AE60",
-                "series": ["#27AE60", "#2ECC71", "#16A085", "#1ABC9C", "#52BE80"]
-            },
-            "futuristic": {
-                "primary": "#3498DB",
-                "series": ["#3498DB", "#9B59B6", "#E74C3C", "#1ABC9C", "#F39C12"]
-            },
-            "luxury": {
-                "primary": "#D4AF37",
-                "series": ["#D4AF37", "#C0C0C0", "#CD7F32", "#000000", "#4A4A4A"]
-            }
-        }
-
-        return color_schemes.get(template, color_schemes["corporate"])
+        return CHART_COLOR_SCHEMES.get(template, CHART_COLOR_SCHEMES["corporate"])
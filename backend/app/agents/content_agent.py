@@ -2,6 +2,12 @@ from .base_agent import BaseAgent
 from .prompts import CONTENT_SYSTEM, CONTENT_USER
 from ..models import SlideContent, DeckRequest, TableData
 from typing import List, Dict, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# suggested_slide_type values that map 1:1 onto SlideContent.slideType
+_SUGGESTED_SLIDE_TYPES = frozenset({"narrative", "table", "image"})
 
 class ContentAgent(BaseAgent):
     """Agent specialized in creating detailed slide content."""
@@ -108,16 +114,10 @@ class ContentAgent(BaseAgent):
                     target_slide.content = [f"LEFT: {p}" for p in left] + [f"RIGHT: {p}" for p in right]
                 
                 # Update slide type if suggested
-                if "suggested_slide_type" in result:
-                    stype = result["suggested_slide_type"]
-                    # Map simplified types to model types
-                    if stype == "narrative":
-                        target_slide.slideType = "narrative"
-                    elif stype == "table":
-                        target_slide.slideType = "table"
-                    elif stype == "image":
-                        target_slide.slideType = "image"
-                    # else keep 'content' or existing
+                stype = result.get("suggested_slide_type")
+                # Map simplified types to model types; else keep 'content' or existing
+                if stype in _SUGGESTED_SLIDE_TYPES:
+                    target_slide.slideType = stype
                 
                 # CRITICAL: Validate content_role="detail" slides have content
                 # detail slides should have paragraph OR substantial content
@@ -127,8 +127,6 @@ class ContentAgent(BaseAgent):
                     
                     if not has_paragraph and not has_content:
                         # Generate fallback content for detail slides
-                        import logging
-                        logger = logging.getLogger(__name__)
                         logger.warning(f"Detail slide '{target_slide.title}' has no content, generating fallback")
                         target_slide.content = [
                             f"Key aspects of {target_slide.title}",
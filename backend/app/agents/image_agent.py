@@ -98,22 +98,6 @@ class ImageAgent(BaseAgent):
                 slides[idx].image_url = f"https://picsum.photos/seed/{seed}/1600/900"
                 logger.info(f"Added fallback image URL for slide {idx}")
         
-        # Add background images to title slides and section dividers
-        suggestions = result.get("image_suggestions", [])
-        logger.info(f"Received {len(suggestions)} image suggestions")
-        
-        for suggestion in suggestions:
-            idx = suggestion.get("slide_index")
-            if idx is not None and idx < len(slides):
-                search_query = suggestion.get("search_query", "")
-                if search_query:
-                    # Use Lorem Picsum for reliable placeholder images
-                    # Each slide gets a unique random image based on slide index
-                    # Format: https://picsum.photos/seed/{seed}/1600/900
-                    seed = f"{presentation_title[:10]}_{idx}_{search_query[:10]}".replace(" ", "_")
-                    slides[idx].image_url = f"https://picsum.photos/seed/{seed}/1600/900"
-                    logger.info(f"Added image URL for slide {idx}: {search_query} -> seed={seed}")
-        
         # Add background images ONLY to the first title slide
         background_query = result.get("background_query", "")
         if background_query:
@@ -5,9 +5,22 @@ import logging
 import os
 import requests
 import re
+from collections import Counter
 
 logger = logging.getLogger(__name__)
 
+# Characters not allowed in a picsum seed (compiled once, used for every sparse slide)
+_SEED_UNSAFE_RE = re.compile(r'[^a-zA-Z0-9_]')
+# Keyword extraction: word tokenizer and stop words, built once instead of per slide
+_WORD_RE = re.compile(r'\b\w+\b')
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+    'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those',
+    'it', 'its', 'they', 'them', 'their', 'we', 'our', 'you', 'your'
+})
+
 IMAGE_SEARCH_SYSTEM = """You are an expert at analyzing slide content and generating precise image search queries.
 Your goal is to find the most relevant images for slides that lack visual content.
 
@@ -82,29 +95,21 @@ class ImageSearchAgent(BaseAgent):
     
     def _extract_keywords_from_slide(self, slide: SlideContent) -> List[str]:
         """Extract meaningful keywords from slide content."""
-        text = ""
+        parts = []
         if slide.title:
-            text += slide.title + " "
+            parts.append(slide.title)
         if slide.content:
-            text += " ".join(slide.content) + " "
+            parts.extend(slide.content)
         if slide.paragraph:
-            text += slide.paragraph
-        
-        # Remove common stop words
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-            'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-            'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those',
-            'it', 'its', 'they', 'them', 'their', 'we', 'our', 'you', 'your'
-        }
-        
-        words = re.findall(r'\b\w+\b', text.lower())
-        keywords = [w for w in words if len(w) > 3 and w not in stop_words]
+            parts.append(slide.paragraph)
+        text = " ".join(parts)
         
-        # Count frequency and return top keywords
-        from collections import Counter
-        word_counts = Counter(keywords)
+        # Tokenize, drop stop words and count in one pass (no intermediate lists)
+        word_counts = Counter(
+            w for w in _WORD_RE.findall(text.lower())
+            if len(w) > 3 and w not in _STOP_WORDS
+        )
+        # Return top keywords
         return [word for word, _ in word_counts.most_common(5)]
     
     async def search_unsplash(self, query: str) -> Optional[str]:
@@ -138,7 +143,7 @@ class ImageSearchAgent(BaseAgent):
     
     def _generate_picsum_url(self, seed: str, width: int = 1600, height: int = 900) -> str:
         """Generate a deterministic picsum URL based on seed."""
-        clean_seed = re.sub(r'[^a-zA-Z0-9_]', '', seed.replace(" ", "_"))
+        clean_seed = _SEED_UNSAFE_RE.sub('', seed.replace(" ", "_"))
         return f"https://picsum.photos/seed/{clean_seed}/{width}/{height}"
     
     async def find_images_for_sparse_slides(
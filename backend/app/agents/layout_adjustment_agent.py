@@ -196,7 +196,8 @@ class LayoutAdjustmentAgent:
             adjusted = self.validate_and_adjust_slide(slide)
             adjusted_slides.append(adjusted)
             
-            if hasattr(adjusted, 'layout_adjustments') and adjusted.layout_adjustments:
+            # layout_adjustments is always a model field; skip building the message unless debugging
+            if adjusted.layout_adjustments and logger.isEnabledFor(logging.DEBUG):
                 logger.debug(f"Slide {i}: adjustments={adjusted.layout_adjustments}")
         
         return adjusted_slides
@@ -1,11 +1,45 @@
 from .base_agent import BaseAgent
 from .prompts import LAYOUT_SYSTEM, LAYOUT_USER
 from ..models import SlideContent, SlideLayoutResponse
+from .. import json_compat
 from typing import List, Dict, Any
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Slides sent to the LLM per layout request
+LAYOUT_BATCH_SIZE = 5
+
+# Structured Outputs schema for the batch response, so every entry is machine-parseable
+_LAYOUT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "LayoutOutput",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "layouts": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "index": {"type": "integer"},
+                            "layout_idx": {"type": "integer", "enum": list(range(9))},
+                            "reasoning": {"type": "string"}
+                        },
+                        "required": ["index", "layout_idx", "reasoning"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["layouts"],
+            "additionalProperties": False
+        }
+    }
+}
+
 class LayoutAgent(BaseAgent):
     """Agent specialized in selecting python-pptx layouts."""
     
@@ -21,18 +55,22 @@ class LayoutAgent(BaseAgent):
     def get_user_prompt_template(self) -> str:
         return LAYOUT_USER
     
+    def get_response_format(self) -> Dict[str, Any]:
+        # Older models only support plain JSON mode
+        if self.supports_json_schema():
+            return _LAYOUT_RESPONSE_FORMAT
+        return super().get_response_format()
+    
     def get_fallback_result(self, **kwargs) -> Dict[str, Any]:
-        stype = kwargs.get("slide_type", "content")
+        return {"layouts": []}
+    
+    def _fallback_layout_idx(self, stype: str) -> int:
         idx = 1
         if stype == "title": idx = 0
         elif stype == "comparison": idx = 4
-        
-        return {
-            "layout_idx": idx,
-            "reasoning": "Fallback default"
-        }
+        return idx
     
-    async def assign_layout(self, slide: SlideContent) -> SlideContent:
+    def _analyze_slide(self, index: int, slide: SlideContent) -> Dict[str, Any]:
         # Analyze content characteristics
         content_text = ""
         if slide.content:
@@ -50,24 +88,63 @@ class LayoutAgent(BaseAgent):
         elif char_count > 50:
             complexity = "medium"
         
-        result = await self.process(
-            title=slide.title,
-            content=content_text,
-            slide_type=slide.slideType,
-            char_count=char_count,
-            has_long_fields=has_long_fields,
-            complexity=complexity
-        )
-        
-        layout_info = SlideLayoutResponse(
-            layout_idx=result.get("layout_idx", 1),
-            notes=result.get("reasoning", "")
-        )
-        
-        slide.layout = layout_info
-        return slide
+        return {
+            "index": index,
+            "title": slide.title,
+            "content": content_text,
+            "slide_type": slide.slideType,
+            "char_count": char_count,
+            "has_long_fields": has_long_fields,
+            "complexity": complexity
+        }
+    
+    def _assign_title_layout(self, slide: SlideContent) -> bool:
+        """Title slides always use the Title Slide layout; no LLM call needed."""
+        if slide.slideType != "title":
+            return False
+        slide.layout = SlideLayoutResponse(layout_idx=0, notes="Title slide")
+        return True
+    
+    async def assign_layout(self, slide: SlideContent) -> SlideContent:
+        if self._assign_title_layout(slide):
+            return slide
+        return (await self._assign_batch([slide]))[0]
     
     async def assign_layouts_all(self, slides: List[SlideContent]) -> List[SlideContent]:
-        import asyncio
-        tasks = [self.assign_layout(s) for s in slides]
-        return list(await asyncio.gather(*tasks))
+        llm_slides = [s for s in slides if not self._assign_title_layout(s)]
+        # Several slides per request, batches in parallel
+        batches = [llm_slides[i:i + LAYOUT_BATCH_SIZE] for i in range(0, len(llm_slides), LAYOUT_BATCH_SIZE)]
+        await asyncio.gather(*[self._assign_batch(batch) for batch in batches])
+        return slides
+    
+    async def _assign_batch(self, slides: List[SlideContent]) -> List[SlideContent]:
+        specs = [self._analyze_slide(i, s) for i, s in enumerate(slides)]
+        result = await self.process(slides_text=json_compat.dumps(specs))
+        
+        by_index = {}
+        for entry in result.get("layouts") or []:
+            if isinstance(entry, dict) and isinstance(entry.get("index"), int):
+                by_index[entry["index"]] = entry
+        
+        retry = []
+        for i, slide in enumerate(slides):
+            entry = by_index.get(i)
+            if entry is not None:
+                slide.layout = SlideLayoutResponse(
+                    layout_idx=entry.get("layout_idx", 1),
+                    notes=entry.get("reasoning", "")
+                )
+            elif len(slides) > 1:
+                retry.append(slide)
+            else:
+                slide.layout = SlideLayoutResponse(
+                    layout_idx=self._fallback_layout_idx(slide.slideType),
+                    notes="Fallback default"
+                )
+        
+        # Slides the batch response dropped fall back to one request each
+        if retry:
+            logger.warning(f"LayoutAgent: {len(retry)} of {len(slides)} slides missing from batch response, retrying individually")
+            await asyncio.gather(*[self._assign_batch([s]) for s in retry])
+        
+        return slides
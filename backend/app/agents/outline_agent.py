@@ -1,11 +1,19 @@
 from .base_agent import BaseAgent
 from .prompts import OUTLINE_SYSTEM, OUTLINE_USER
-from ..models import DeckOutline, OutlineSection
+from ..models import DeckOutline
 from typing import Dict, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Fields read from each LLM outline section, with the default used when missing
+_SECTION_DEFAULTS = {
+    "title": "Section",
+    "description": "",
+    "weight": 5,
+    "key_points": [],
+}
+
 class OutlineAgent(BaseAgent):
     """Agent specialized in creating presentation outlines."""
     
@@ -54,22 +62,16 @@ class OutlineAgent(BaseAgent):
             template=request.template
         )
         
-        # Parse JSON into Pydantic models
+        # Parse JSON into Pydantic models (one validation pass over the whole outline)
         try:
-            sections = []
-            for sec in result.get("sections", []):
-                sections.append(OutlineSection(
-                    title=sec.get("title", "Section"),
-                    description=sec.get("description", ""),
-                    weight=sec.get("weight", 5),
-                    key_points=sec.get("key_points", [])
-                ))
-            return DeckOutline(title=result.get("title", request.prompt), sections=sections)
+            return DeckOutline.model_validate({
+                "title": result.get("title", request.prompt),
+                "sections": [
+                    {key: sec.get(key, default) for key, default in _SECTION_DEFAULTS.items()}
+                    for sec in result.get("sections", [])
+                ]
+            })
         except Exception as e:
             logger.error(f"Error parsing outline result: {e}")
-            fallback = self.get_fallback_result(prompt=request.prompt)
             # Re-construct manual fallback
-            sections = [
-                OutlineSection(**s) for s in fallback["sections"]
-            ]
-            return DeckOutline(title=fallback["title"], sections=sections)
+            return DeckOutline.model_validate(self.get_fallback_result(prompt=request.prompt))
@@ -1,5 +1,4 @@
 # Centralized Prompt Management for Slides Generator Agents
-from .knowledge.pptx_api_manual import PPTX_API_MANUAL
 
 # -------------------------------------------------------------------------
 # OUTLINE AGENT
@@ -67,17 +66,6 @@ Your goal is to create diverse and engaging content following these STRICT RULES
 4. **Images**: Only use when explicitly needed for visual context.
 
 ALWAYS respect the 'content_role' field provided in the input.
-You MUST respond with a valid JSON object matching the requested schema."""
-
-CONTENT_USER = """Create detailed content for this slide.
-
-Slide Title: {slide_title}
-Presentation Context: {presentation_title}
-Current Outline Hint: {current_content}
-Audience: {audience}
-Template Style: {template}
-**Content Role: {content_role}**
-**Target Layout Type: {layout_type}**
 
 ⚠️ CRITICAL: Generate SUBSTANTIAL content matching the layout_type - empty or minimal content is UNACCEPTABLE!
 
@@ -101,30 +89,46 @@ Template Style: {template}
 - Content must be specific to the slide title and context
 
 Return format:
-{{
-  "layout_type": "{layout_type}",
+{
+  "layout_type": "<Target Layout Type>",
   "points": ["Specific point 1...", "Specific point 2..."],
   "paragraph": "Detailed explanation (200+ words for narrative)...",
   "image_description": "Specific visual description...",
-  "table": {{
+  "table": {
     "headers": ["Column 1", "Column 2", "Column 3"],
     "rows": [["Data1", "Data2", "Data3"], ["Data4", "Data5", "Data6"]]
-  }},
+  },
   "chart_type": "bar",
-  "chart_data": {{
+  "chart_data": {
     "labels": ["Q1", "Q2", "Q3", "Q4"],
     "values": [45, 67, 82, 95]
-  }},
+  },
   "quote_text": "Powerful quote text...",
   "quote_author": "Author Name, Title",
   "timeline_events": [
-    {{"date": "2020", "title": "Event 1", "description": "Details..."}},
-    {{"date": "2021", "title": "Event 2", "description": "Details..."}}
+    {"date": "2020", "title": "Event 1", "description": "Details..."},
+    {"date": "2021", "title": "Event 2", "description": "Details..."}
   ],
   "two_column_left": ["Left point 1", "Left point 2"],
   "two_column_right": ["Right point 1", "Right point 2"],
   "suggested_slide_type": "content"
-}}"""
+}
+
+You MUST respond with a valid JSON object matching the requested schema."""
+
+# Only the slide-specific fields are sent per call; all static instructions live in
+# CONTENT_SYSTEM so every content call shares one cacheable prompt prefix.
+CONTENT_USER = """Create detailed content for this slide.
+
+Slide Title: {slide_title}
+Presentation Context: {presentation_title}
+Current Outline Hint: {current_content}
+Audience: {audience}
+Template Style: {template}
+**Content Role: {content_role}**
+**Target Layout Type: {layout_type}**
+
+Generate the content for the Target Layout Type above, in the return format given."""
 
 # -------------------------------------------------------------------------
 # DESIGN AGENT
@@ -161,39 +165,6 @@ Return format:
   }}
 }}"""
 
-# -------------------------------------------------------------------------
-# LAYOUT AGENT
-# -------------------------------------------------------------------------
-LAYOUT_SYSTEM = f"""You are a Python-PPTX Expert.
-Your knowledge base is strictly defined below:
-{PPTX_API_MANUAL}
-
-Your goal is to choose the BEST standard PPTX slide layout (Index 0-8) for a given slide content to maximize visual interest.
-Do NOT invent new layouts. Use the standard ones.
-
-Rules for Layout Selection:
-1. Index 0 (Title Slide): Use ONLY for the very first slide of the deck.
-2. Index 1 (Title + Content): Use for standard lists with 3-5 items.
-3. Index 3 (Two Content): STRONGLY PREFER this for lists with 6+ items, OR to contrast two ideas (Pros/Cons), OR simply to break visual monotony.
-4. Index 4 (Comparison): Use specifically when comparing two distinct entities side-by-side.
-5. Index 5 (Title Only): USE THIS for 'table', 'narrative', or 'image' slides. It provides a clean canvas for custom elements.
-6. Index 8 (Title + Picture): Use if the content implies a specific image placement next to text.
-
-Goal: Avoid consecutive slides using the same layout (especially Layout 1) if possible.
-You MUST respond with a valid JSON object."""
-
-LAYOUT_USER = """Select the best Python-PPTX layout for this slide.
-
-Slide Title: {title}
-Content Points: {content}
-Intended Type: {slide_type}
-
-Return format:
-{{
-  "layout_idx": 1,
-  "reasoning": "Standard bullet points fit best in Layout 1"
-}}"""
-
 # -------------------------------------------------------------------------
 # REVIEW AGENT
 # -------------------------------------------------------------------------
@@ -221,13 +192,9 @@ Your role is to CHECK for errors and polish language ONLY - NOT to restructure o
 
 You MUST respond with a valid JSON object preserving ALL original fields and structure."""
 
-REVIEW_USER = """Review and polish the following presentation slides - ONLY fix errors, do NOT restructure.
-
-Presentation Title: {title}
-Audience: {audience}
-
-Slides Content (JSON format):
-{slides_text}
+# Static instructions come first so every review call shares an identical prefix
+# (eligible for provider-side prompt caching); only the suffix varies per deck.
+REVIEW_USER_PREFIX = """Review and polish the following presentation slides - ONLY fix errors, do NOT restructure.
 
 **Your Task:**
 1. Check each slide for grammar, spelling, and clarity issues
@@ -254,7 +221,17 @@ Return format:
       "table": {{ ... }}
     }}
   ]
-}}"""
+}}
+"""
+
+REVIEW_USER_SUFFIX = """
+Presentation Title: {title}
+Audience: {audience}
+
+Slides Content (JSON format):
+{slides_text}"""
+
+REVIEW_USER = REVIEW_USER_PREFIX + REVIEW_USER_SUFFIX
 
 # -------------------------------------------------------------------------
 # LAYOUT AGENT
@@ -279,41 +256,39 @@ Your goal is to select the optimal python-pptx layout based on content character
 - IF content is very long (>100 characters): Suggest smaller font or split layout
 - Prioritize readability over style
 
-You MUST respond with a valid JSON object."""
-
-LAYOUT_USER = """Select the optimal layout for this slide.
-
-Slide Title: {title}
-Slide Content: {content}
-Slide Type: {slide_type}
-
-Content Analysis:
-- Character count: {char_count}
-- Has long fields (>20 chars): {has_long_fields}
-- Content complexity: {complexity}
-
-Layout Options:
-0: Title Slide (for introductions)
-1: Title + Content (for bullet points)
-2: Section Header (for transitions)
-3: Two Content (for comparisons, split content)
-4: Comparison (for side-by-side)
-5: Title Only (for minimal content)
-6: Blank (for custom layouts)
-7: Content with Caption (for images)
-8: Picture with Caption (for large images)
-
 **Optimization Rules:**
 - IF has_long_fields=True: Prefer layout_idx=3 (Two Content) to split content across columns
 - IF char_count > 100: Consider layout_idx=3 for better space management
 - IF slide_type="comparison": Use layout_idx=3 or 4
 - IF slide_type="image": Use layout_idx=7 or 8
 
+You MUST respond with a valid JSON object."""
+
+# Several slides per request: the static instructions are sent once per batch
+# instead of once per slide, and come first so the prompt prefix is cacheable.
+# Layouts are defined once in LAYOUT_SYSTEM and referenced here by layout_idx only.
+LAYOUT_USER = """Select the optimal layout for each of the slides below. Analyze every slide independently.
+
+Each slide is given with its content analysis:
+- char_count: Character count
+- has_long_fields: Has long fields (>20 chars)
+- complexity: Content complexity
+
+Choose each layout_idx from the layouts defined in your instructions.
+Return exactly one entry per slide, using the slide's "index".
 Return format:
 {{
-  "layout_idx": 1,
-  "reasoning": "Selected layout X because [explain why, mention content length if relevant]"
-}}"""
+  "layouts": [
+    {{
+      "index": 0,
+      "layout_idx": 1,
+      "reasoning": "Selected layout X because [explain why, mention content length if relevant]"
+    }}
+  ]
+}}
+
+Slides (JSON format):
+{slides_text}"""
 
 # -------------------------------------------------------------------------
 # IMAGE AGENT
@@ -2,6 +2,110 @@ from .base_agent import BaseAgent
 from .prompts import REVIEW_SYSTEM, REVIEW_USER
 from ..models import SlideContent
 from typing import List, Dict, Any
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+import asyncio
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+# Compiled once at import and reused for every serialization of the deck
+_SLIDE_LIST_ADAPTER = TypeAdapter(List[SlideContent])
+
+# The only fields the LLM is allowed to edit. Everything else on a slide is copied
+# from the already-validated original, so only these need validating per slide.
+_REVIEWED_FIELDS = ("title", "slideType", "content", "paragraph", "image_description", "table")
+_OVERRIDE_IF_PRESENT_FIELDS = frozenset({"title", "slideType"})
+_ReviewedSlide = TypedDict("_ReviewedSlide", {
+    name: SlideContent.model_fields[name].annotation for name in _REVIEWED_FIELDS
+}, total=False)
+_REVIEWED_SLIDE_ADAPTER = TypeAdapter(_ReviewedSlide)
+
+
+def _strict_schema(schema: Any) -> Any:
+    """Make every object in a JSON schema strict (all keys required, no extras) for Structured Outputs."""
+    if isinstance(schema, dict):
+        schema = {k: _strict_schema(v) for k, v in schema.items()}
+        if schema.get("type") == "object" and "properties" in schema:
+            schema["required"] = list(schema["properties"])
+            schema["additionalProperties"] = False
+    elif isinstance(schema, list):
+        schema = [_strict_schema(v) for v in schema]
+    return schema
+
+
+# Response schema for the reviewer, generated once at import. Constrained decoding
+# guarantees parseable output with exactly the fields _merge_slide reads.
+_slide_schema = _strict_schema(_REVIEWED_SLIDE_ADAPTER.json_schema())
+_REVIEW_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "ReviewOutput",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"slides": {"type": "array", "items": {k: v for k, v in _slide_schema.items() if k != "$defs"}}},
+            "required": ["slides"],
+            "additionalProperties": False,
+            "$defs": _slide_schema.get("$defs", {}),
+        },
+    },
+}
+
+# Slides per review request, and how many review requests may run at once
+REVIEW_CHUNK_SIZE = 6
+REVIEW_MAX_CONCURRENCY = 4
+
+# Opt-in: decks that pass the local checks below skip the LLM review call. Off by
+# default because the checks cannot see typos, tone or factual problems.
+REVIEW_SKIP_CLEAN = os.getenv("REVIEW_SKIP_CLEAN", "0") == "1"
+
+# Local quality gate used when REVIEW_SKIP_CLEAN is on
+MAX_BULLET_CHARS = 250
+MAX_PARAGRAPH_CHARS = 1500
+_TEXT_SMELLS = re.compile(
+    r"\b(\w+)\s+\1\b"   # doubled word ("the the")
+    r"|\S {2,}\S"         # double space inside text
+    r"|\s[,.;:!?]",        # space before punctuation
+    re.IGNORECASE,
+)
+
+
+def _needs_review(slides: List[SlideContent]) -> bool:
+    """Cheap local checks for problems worth an LLM review round-trip."""
+    for slide in slides:
+        if slide.slideType != "title" and not slide.content and not slide.paragraph and not slide.table:
+            return True  # empty slide
+        if any(len(point) > MAX_BULLET_CHARS for point in slide.content):
+            return True
+        if slide.paragraph and len(slide.paragraph) > MAX_PARAGRAPH_CHARS:
+            return True
+        texts = [slide.title, *slide.content]
+        if slide.paragraph:
+            texts.append(slide.paragraph)
+        if any(_TEXT_SMELLS.search(text) for text in texts):
+            return True
+    return False
+
+
+# Fields hidden from the LLM for every slide in the list.
+# We strip layout from the input to the LLM to save tokens and avoid confusion, 
+# as the LLM shouldn't be editing layout indices. Image/chart URLs and layout
+# hints are pipeline metadata the reviewer never edits; they are restored from
+# the original slide on merge.
+_LLM_HIDDEN_FIELDS = {"layout", "image_url", "background_image_url", "chart_url", "layout_adjustments"}
+_LLM_EXCLUDE = {"__all__": _LLM_HIDDEN_FIELDS}
+
+
+def _serialize_slides(slides: List[SlideContent]) -> str:
+    """Serialize slides to the JSON text shown to the LLM (CPU-bound, run in a worker thread)."""
+    # One pydantic-core call projects and encodes the whole deck, instead of a
+    # Python-level model_dump per slide followed by json.dumps. Null fields are
+    # dropped so sparse slides don't pay tokens for keys they don't use, and the
+    # JSON is compact: indentation only costs prompt tokens.
+    return _SLIDE_LIST_ADAPTER.dump_json(slides, exclude=_LLM_EXCLUDE, exclude_none=True).decode("utf-8")
 
 class ReviewAgent(BaseAgent):
     """Agent specialized in reviewing and polishing the presentation."""
@@ -18,81 +122,133 @@ class ReviewAgent(BaseAgent):
     def get_user_prompt_template(self) -> str:
         return REVIEW_USER
     
+    def get_response_format(self) -> Dict[str, Any]:
+        # Older models only support plain JSON mode
+        if self.supports_json_schema():
+            return _REVIEW_RESPONSE_FORMAT
+        return super().get_response_format()
+    
     def get_fallback_result(self, **kwargs) -> Dict[str, Any]:
         # Fallback: return original slides structure (reconstructed from input logic if complex, 
         # but here we might just return empty or catch it upper level)
         return {"slides": []}
     
-    async def review_slides(self, slides: List[SlideContent], title: str, audience: str) -> List[SlideContent]:
-        # Serialize full objects to JSON string so LLM sees all fields
-        import json
-        # We strip layout from the input to the LLM to save tokens and avoid confusion, 
-        # as the LLM shouldn't be editing layout indices.
-        slides_data_for_llm = []
-        for s in slides:
-            d = s.model_dump(exclude={"layout"})
-            slides_data_for_llm.append(d)
-            
-        slides_text = json.dumps(slides_data_for_llm, indent=2, ensure_ascii=False)
+    async def review_slides(
+        self,
+        slides: List[SlideContent],
+        title: str,
+        audience: str
+    ) -> List[SlideContent]:
+        # With REVIEW_SKIP_CLEAN, clean decks skip the whole LLM call
+        if REVIEW_SKIP_CLEAN and not _needs_review(slides):
+            logger.info("ReviewAgent: slides passed local quality checks, skipping LLM review")
+            return slides
+        
+        # Slides that look identical to the LLM (e.g. repeated "Questions?" slides) are
+        # reviewed once and the result is fanned back out to every copy.
+        unique_slides: List[SlideContent] = []
+        unique_index: Dict[str, int] = {}
+        index_map: List[int] = []
+        for slide in slides:
+            sig = slide.model_dump_json(exclude=_LLM_HIDDEN_FIELDS, exclude_none=True)
+            if sig not in unique_index:
+                unique_index[sig] = len(unique_slides)
+                unique_slides.append(slide)
+            index_map.append(unique_index[sig])
+        
+        reviewed = await self._review_unique(unique_slides, title, audience)
+        
+        result = []
+        for slide, u in zip(slides, index_map):
+            if slide is unique_slides[u]:
+                result.append(reviewed[u])
+            elif reviewed[u] is unique_slides[u]:
+                result.append(slide)  # review left it unchanged
+            else:
+                # Duplicates share every LLM-visible field, so copy over the reviewed ones
+                # and keep this slide's own layout/images.
+                result.append(slide.model_copy(update={k: getattr(reviewed[u], k) for k in _REVIEWED_FIELDS}))
+        return result
+    
+    async def _review_unique(self, slides: List[SlideContent], title: str, audience: str) -> List[SlideContent]:
+        # Review the deck in small chunks concurrently: smaller prompts finish faster and
+        # stay well within max_tokens, so large decks are no longer truncated into the
+        # count-mismatch fallback. Title/audience are sent with every chunk for consistent tone.
+        chunks = [slides[i:i + REVIEW_CHUNK_SIZE] for i in range(0, len(slides), REVIEW_CHUNK_SIZE)]
+        semaphore = asyncio.Semaphore(REVIEW_MAX_CONCURRENCY)
+        
+        async def _bounded(chunk: List[SlideContent]) -> List[SlideContent]:
+            async with semaphore:
+                return await self._review_chunk(chunk, title, audience)
+        
+        results = await asyncio.gather(*[_bounded(chunk) for chunk in chunks])
+        return [s for chunk_result in results for s in chunk_result]
+    
+    async def _review_chunk(self, slides: List[SlideContent], title: str, audience: str) -> List[SlideContent]:
+        """
+        Review one chunk of slides.
+        Returns the reviewed slides, or the original slides if the LLM output is unusable.
+        """
+        # Serialize full objects to JSON string so LLM sees all fields.
+        # Done off the event loop so concurrent decks/agents are not blocked.
+        slides_text = await asyncio.to_thread(_serialize_slides, slides)
             
-        result = await self.process(
+        # Stream the review so each slide is merged as soon as the LLM has finished it,
+        # overlapping the merge work with the remaining token generation.
+        result = {}
+        merged_slides = []
+        async for partial in self.process_stream(
             title=title,
             audience=audience,
             slides_text=slides_text
-        )
+        ):
+            result = partial or {}
+            partial_slides = result.get("slides") or []
+            # Every slide before the last one in the partial list is complete
+            while len(merged_slides) < min(len(partial_slides) - 1, len(slides)):
+                i = len(merged_slides)
+                merged_slides.append(self._merge_slide(slides[i], partial_slides[i]))
         
         # Parse result back to objects
-        reviewed_slides = []
         raw_slides = result.get("slides", [])
         
         # Merge Strategy:
         # If the LLM returns the same number of slides, we map them 1:1 and preserve 'layout' and 'notes' from original.
-        # If the count differs, we accept the LLM's structure but we lose the specific layout assignments (they revert to None/Default).
+        # If the count differs, we keep the original slides of this chunk.
         
         if len(raw_slides) == len(slides):
-            for i, s_dict in enumerate(raw_slides):
-                original = slides[i]
-                
-                # We need to construct the TableData object correctly if it exists
-                table_data = s_dict.get("table")
-                
-                # 获取LLM返回的content，如果为空则保留原始content
-                new_content = s_dict.get("content")
-                if not new_content or (isinstance(new_content, list) and len(new_content) == 0):
-                    new_content = original.content  # 保留原始content
-                
-                # 获取LLM返回的paragraph，如果为空则保留原始
-                new_paragraph = s_dict.get("paragraph")
-                if not new_paragraph:
-                    new_paragraph = original.paragraph
-                
-                new_slide = SlideContent(
-                    title=s_dict.get("title", original.title),
-                    slideType=s_dict.get("slideType", original.slideType),
-                    content=new_content if new_content else [],
-                    paragraph=new_paragraph,
-                    image_description=s_dict.get("image_description") or original.image_description,
-                    image_url=original.image_url,  # Preserve image URLs
-                    background_image_url=original.background_image_url,  # Preserve background URLs
-                    table=table_data if table_data else original.table,
-                    # CRITICAL: Preserve the layout assigned by LayoutAgent
-                    layout=original.layout,
-                    notes=original.notes,
-                    # CRITICAL: Preserve content_role and layout_type
-                    content_role=original.content_role,
-                    layout_type=original.layout_type,
-                    chart_url=original.chart_url,
-                    chart_type=original.chart_type
-                )
-                reviewed_slides.append(new_slide)
-            return reviewed_slides
+            for i in range(len(merged_slides), len(slides)):
+                merged_slides.append(self._merge_slide(slides[i], raw_slides[i]))
+            return merged_slides
             
         elif len(raw_slides) > 0:
             # Fallback for count mismatch - 保守策略：直接返回原始slides
             # 因为数量不匹配说明LLM可能出错了，不应该用它的结果
-            import logging
-            logger = logging.getLogger(__name__)
             logger.warning(f"ReviewAgent: 幻灯片数量不匹配 (原始: {len(slides)}, 返回: {len(raw_slides)})，保留原始内容")
-            return slides
+            return list(slides)
         else:
-            return slides
+            return list(slides)
+    
+    def _merge_slide(self, original: SlideContent, s_dict: Dict[str, Any]) -> SlideContent:
+        """Merge one LLM-reviewed slide dict over the original slide."""
+        update = {}
+        
+        # title/slideType are taken whenever present; the rest only when non-empty
+        # (获取LLM返回的content/paragraph等，如果为空则保留原始)
+        for name in _REVIEWED_FIELDS:
+            if name not in s_dict:
+                continue
+            value = s_dict[name]
+            if not value and name not in _OVERRIDE_IF_PRESENT_FIELDS:
+                continue
+            # Most slides come back untouched; unchanged fields need no validation
+            if value != getattr(original, name):
+                update[name] = value
+        
+        if not update:
+            return original
+        
+        # Validate only the edited fields, then copy the original so layout, notes,
+        # content_role, layout_type, image/background/chart URLs are preserved
+        # (CRITICAL for LayoutAgent output) without re-validating them.
+        return original.model_copy(update=_REVIEWED_SLIDE_ADAPTER.validate_python(update))
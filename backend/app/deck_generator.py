@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import os
 from typing import Dict, Any
 from .models import DeckRequest
 from .storage import deck_storage
@@ -6,6 +8,9 @@ from .workflow.workflow_manager import WorkflowManager
 
 logger = logging.getLogger(__name__)
 
+# Decks generated at once; further requests wait in the "Starting generation..." state
+DECK_MAX_CONCURRENCY = int(os.getenv("DECK_MAX_CONCURRENCY", "4"))
+
 
 class DeckGenerator:
     """
@@ -23,6 +28,7 @@ class DeckGenerator:
 
     def __init__(self):
         self.workflow_manager = WorkflowManager()
+        self._semaphore = asyncio.Semaphore(DECK_MAX_CONCURRENCY)
 
     async def generate_deck(
         self,
@@ -37,16 +43,12 @@ class DeckGenerator:
             logger.info(f"[{deck_id}] Starting deck generation via WorkflowManager")
 
             # Execute sophisticated workflow (包含PPTX生成)
-            slides, design_config = await self.workflow_manager.execute_workflow(deck_id, request, storage)
+            async with self._semaphore:
+                slides, design_config, pptx_path = await self.workflow_manager.execute_workflow(deck_id, request, storage)
 
-            # Workflow已经生成了PPTX文件，从workflow获取文件路径
-            pptx_files = list(self.workflow_manager.pptx_dir.glob(f"presentation_{deck_id}_*.pptx"))
-            if pptx_files:
-                # 使用最新的PPTX文件
-                file_path = str(sorted(pptx_files, key=lambda x: x.stat().st_mtime)[-1])
-                logger.info(f"[{deck_id}] Using generated PPTX: {file_path}")
-            else:
-                raise FileNotFoundError(f"No PPTX file found for deck {deck_id}")
+            # Workflow已经生成了PPTX文件，直接使用返回的路径（存绝对路径，下载时无需再解析）
+            file_path = os.path.abspath(pptx_path)
+            logger.info(f"[{deck_id}] Using generated PPTX: {file_path}")
 
             # Stage: DONE
             storage[deck_id]["status"] = "done"
@@ -55,7 +57,7 @@ class DeckGenerator:
             storage[deck_id]["file_path"] = file_path
 
             # Save final state to persistent storage
-            deck_storage.save(storage)
+            await deck_storage.save_deck_async(deck_id, storage)
 
             logger.info(f"[{deck_id}] Deck generation complete: {file_path}")
 
@@ -67,11 +69,15 @@ class DeckGenerator:
             storage[deck_id]["currentStep"] = "Generation failed"
 
             # Save error state to persistent storage
-            deck_storage.save(storage)
+            await deck_storage.save_deck_async(deck_id, storage)
+
+    def close(self):
+        """Release the workflow's HTTP resources (called on app shutdown)."""
+        self.workflow_manager.close()
 
     async def _update_status(self, storage, deck_id, status, progress, step):
         if deck_id in storage:
             storage[deck_id]["status"] = status
             storage[deck_id]["progress"] = progress
             storage[deck_id]["currentStep"] = step
-            deck_storage.save(storage)
+            await deck_storage.save_deck_async(deck_id, storage)
@@ -0,0 +1,113 @@
+import os
+import time
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: slide images are read from disk instead of re-downloaded across decks.
+# Off by default because some image URLs (e.g. Unsplash query URLs) return a
+# different picture on every request.
+IMAGE_CACHE_ENABLED = os.getenv("IMAGE_CACHE", "0") == "1"
+# Least recently used images are evicted once the cache grows past this size
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_MB", "512")) * 1024 * 1024
+# Seconds a cached image is served without asking the origin; after that it is
+# revalidated with a conditional GET (a 304 keeps the cached bytes)
+IMAGE_CACHE_TTL = int(os.getenv("IMAGE_CACHE_TTL", "86400"))
+
+
+class ImageCache:
+    """
+    Persistent cache of downloaded images keyed by URL, with LRU eviction.
+    Backed by a single SQLite table; safe to use from worker threads.
+    """
+
+    def __init__(self, cache_file: str = None, max_bytes: int = IMAGE_CACHE_MAX_BYTES):
+        if cache_file:
+            self.cache_file = cache_file
+        else:
+            # backend/app/image_cache.py -> backend/cache/images.sqlite
+            base_dir = Path(__file__).resolve().parent.parent
+            self.cache_file = str(base_dir / "cache" / "images.sqlite")
+
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (callers hold the lock)."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            self._conn = sqlite3.connect(self.cache_file, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS images ("
+                "url TEXT PRIMARY KEY, data BLOB NOT NULL, etag TEXT, last_modified TEXT, "
+                "size INTEGER NOT NULL, used REAL NOT NULL, fetched REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(images)")}
+            if "fetched" not in columns:
+                # Caches created before revalidation existed: treat every entry as stale
+                self._conn.execute("ALTER TABLE images ADD COLUMN fetched REAL NOT NULL DEFAULT 0")
+        return self._conn
+
+    def get(self, url: str) -> Optional[Tuple[bytes, Optional[str], Optional[str], float]]:
+        """Return (data, etag, last_modified, fetched_at) for url, or None."""
+        with self.lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT data, etag, last_modified, fetched FROM images WHERE url = ?", (url,)
+                ).fetchone()
+                if row:
+                    with conn:
+                        conn.execute("UPDATE images SET used = ? WHERE url = ?", (time.time(), url))
+                return row
+            except Exception as e:
+                logger.warning(f"Image cache read failed: {e}")
+                return None
+
+    def put(self, url: str, data: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Store an image under url, evicting the least recently used ones if over the size limit."""
+        with self.lock:
+            try:
+                conn = self._connect()
+                with conn:
+                    now = time.time()
+                    conn.execute(
+                        "INSERT OR REPLACE INTO images (url, data, etag, last_modified, size, used, fetched) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (url, data, etag, last_modified, len(data), now, now)
+                    )
+                    self._evict(conn)
+            except Exception as e:
+                logger.warning(f"Image cache write failed: {e}")
+
+    def mark_fresh(self, url: str):
+        """Record that the origin confirmed the cached copy is current (HTTP 304)."""
+        with self.lock:
+            try:
+                conn = self._connect()
+                with conn:
+                    now = time.time()
+                    conn.execute("UPDATE images SET fetched = ?, used = ? WHERE url = ?", (now, now, url))
+            except Exception as e:
+                logger.warning(f"Image cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used rows until the total size fits (callers hold the lock)."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in conn.execute("SELECT url, size FROM images ORDER BY used").fetchall():
+            conn.execute("DELETE FROM images WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+# Global cache instance
+image_cache = ImageCache()
@@ -0,0 +1,36 @@
+"""
+JSON helpers backed by orjson when it is installed, stdlib json otherwise.
+
+orjson parses and encodes several times faster and produces UTF-8 bytes
+directly; output matches json.dumps(..., ensure_ascii=False) with the same
+indentation, so callers can switch without changing what gets written.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse a JSON document from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """Encode obj as UTF-8 JSON bytes (2-space indent if indent is True)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Encode obj as a JSON str (2-space indent if indent is True)."""
+    return dumps_bytes(obj, indent).decode("utf-8")
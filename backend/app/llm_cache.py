@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: identical prompts return the stored response instead of calling the API.
+# Off by default so repeated requests still get fresh, creative output.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "0") == "1"
+
+
+class LLMCache:
+    """
+    Persistent cache of LLM responses keyed by a hash of the request.
+    Backed by a single SQLite table; safe to use from worker threads.
+    """
+
+    def __init__(self, cache_file: str = None):
+        if cache_file:
+            self.cache_file = cache_file
+        else:
+            # backend/app/llm_cache.py -> backend/cache/llm.sqlite
+            base_dir = Path(__file__).resolve().parent.parent
+            self.cache_file = str(base_dir / "cache" / "llm.sqlite")
+
+        self.lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (callers hold the lock)."""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            self._conn = sqlite3.connect(self.cache_file, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        return self._conn
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """SHA-256 of the JSON-encoded request parts (model, messages, temperature, ...)."""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None."""
+        with self.lock:
+            try:
+                row = self._connect().execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                return row[0] if row else None
+            except Exception as e:
+                logger.warning(f"LLM cache read failed: {e}")
+                return None
+
+    def put(self, key: str, value: str):
+        """Store a response under key."""
+        with self.lock:
+            try:
+                conn = self._connect()
+                conn.execute("INSERT OR REPLACE INTO llm_cache (key, value) VALUES (?, ?)", (key, value))
+                conn.commit()
+            except Exception as e:
+                logger.warning(f"LLM cache write failed: {e}")
+
+
+# Global cache instance
+llm_cache = LLMCache()
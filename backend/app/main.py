@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from pathlib import Path
 import uuid
+from datetime import datetime
 import logging
 import os
 from dotenv import load_dotenv
@@ -18,6 +19,7 @@ load_dotenv(dotenv_path=dotenv_path)
 from .deck_generator import DeckGenerator
 from .models import DeckRequest, DeckResponse, DeckStatusResponse
 from .storage import deck_storage
+from .agents.base_agent import close_http_client, prewarm_http_client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -45,6 +47,20 @@ logger.info(f"Loaded {len(decks_storage)} existing decks from storage")
 deck_generator = DeckGenerator()
 
 
+@app.on_event("startup")
+async def startup():
+    # Do the TLS handshake with the LLM API now instead of on the first deck
+    await prewarm_http_client()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Close the keep-alive pool shared by all LLM agents
+    await close_http_client()
+    # Close the image download pool used when rendering PPTX files
+    deck_generator.close()
+
+
 @app.get("/")
 async def root():
     return {
@@ -67,20 +83,7 @@ async def list_decks():
     Returns:
     - List of decks with their current status
     """
-    decks_list = []
-
-    for deck_id, deck_data in decks_storage.items():
-        deck_info = {
-            "deckId": deck_data["deckId"],
-            "status": deck_data["status"],
-            "progress": deck_data.get("progress", 0),
-            "prompt": deck_data.get("request", {}).get("prompt", "Unknown"),
-            "slideCount": deck_data.get("request", {}).get("slideCount", 0),
-            "template": deck_data.get("request", {}).get("template", "corporate"),
-            "createdAt": deck_data.get("createdAt", None),
-            "error": deck_data.get("error")
-        }
-        decks_list.append(deck_info)
+    decks_list = deck_storage.list_summaries(decks_storage)
 
     # Sort by creation time (most recent first)
     # For now, just return in order since we don't have timestamps yet
@@ -108,18 +111,17 @@ async def create_deck(
         logger.info(f"Creating deck {deck_id} with prompt: {request.prompt[:50]}...")
 
         # Initialize deck status
-        from datetime import datetime
         deck_data = {
             "deckId": deck_id,
             "status": "outline",
             "progress": 0,
             "currentStep": "Starting generation...",
-            "request": request.dict(),
+            "request": request.model_dump(),
             "createdAt": datetime.now().isoformat()
         }
 
         # Save to persistent storage
-        deck_storage.update_deck(deck_id, deck_data, decks_storage)
+        await deck_storage.update_deck(deck_id, deck_data, decks_storage)
 
         # Start background task for deck generation
         background_tasks.add_task(
@@ -205,14 +207,14 @@ async def download_deck(deck_id: str):
             detail="File path not found"
         )
     
-    # Ensure absolute path
+    # New decks store an absolute path; only decks saved before that need resolving
     if not os.path.isabs(file_path):
-        # Assuming file_path is relative to project root (where script is run)
-        # But just in case, let's resolve it carefully
-        # If it starts with backend/, and we are in root, it is fine
         file_path = os.path.abspath(file_path)
 
-    if not os.path.exists(file_path):
+    # Stat once and hand the result to FileResponse so it doesn't stat again
+    try:
+        stat_result = os.stat(file_path)
+    except FileNotFoundError:
         logger.error(f"File not found at path: {file_path}")
         raise HTTPException(
             status_code=500,
@@ -221,6 +223,7 @@ async def download_deck(deck_id: str):
 
     return FileResponse(
         path=file_path,
+        stat_result=stat_result,
         media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
         filename=f"presentation-{deck_id}.pptx"
     )
@@ -246,7 +249,7 @@ async def delete_deck(deck_id: str):
             logger.warning(f"Failed to delete file: {str(e)}")
 
     # Remove from storage (both in-memory and persistent)
-    deck_storage.delete_deck(deck_id, decks_storage)
+    await deck_storage.delete_deck(deck_id, decks_storage)
 
     return {"message": f"Deck {deck_id} deleted successfully"}
 
@@ -0,0 +1,45 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Requests per minute allowed against the LLM API across the whole process
+# (0 disables rate limiting). Set just under the account's RPM limit so calls
+# queue locally instead of bouncing off 429s and retrying.
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "0"))
+
+
+class TokenBucket:
+    """
+    Async token bucket: tokens refill continuously at `rate` per second up to
+    `capacity`; acquire() waits until enough tokens are available.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0):
+        """Take `tokens` from the bucket, sleeping until they have refilled."""
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+# Shared by every LLM request (see base_agent.get_http_client)
+llm_rate_limiter: Optional[TokenBucket] = (
+    TokenBucket(rate=OPENAI_RPM / 60.0, capacity=max(1, OPENAI_RPM // 60)) if OPENAI_RPM > 0 else None
+)
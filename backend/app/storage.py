@@ -1,28 +1,38 @@
-import json
 import os
+import asyncio
 import logging
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+import sqlite3
 import threading
+from . import json_compat
 
 logger = logging.getLogger(__name__)
 
 
 class DeckStorage:
     """
-    Persistent storage for deck data using JSON file.
+    Persistent storage for deck data using SQLite (one row per deck).
     Provides thread-safe operations for saving and loading deck metadata.
+
+    The in-memory decks_storage dict stays the read path; saving a deck only
+    rewrites that deck's row instead of the whole store.
     """
 
     def __init__(self, storage_file: str = None):
         if storage_file:
             self.storage_file = storage_file
         else:
-            # Resolve absolute path relative to this file: backend/app/storage.py -> backend/data/decks.json
+            # Resolve absolute path relative to this file: backend/app/storage.py -> backend/data/decks.sqlite
             base_dir = Path(__file__).resolve().parent.parent
-            self.storage_file = str(base_dir / "data" / "decks.json")
+            self.storage_file = str(base_dir / "data" / "decks.sqlite")
             
         self.lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Orders async saves so a stale snapshot never lands after a newer one
+        self._async_lock = asyncio.Lock()
+        # deck_id -> listing fields that never change after creation (see list_summaries)
+        self._listing_cache: Dict[str, Dict[str, Any]] = {}
         self._ensure_storage_dir()
 
     def _ensure_storage_dir(self):
@@ -32,63 +42,100 @@ class DeckStorage:
             os.makedirs(storage_dir, exist_ok=True)
             logger.info(f"Storage directory ensured: {storage_dir}")
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (callers hold the lock)."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.storage_file, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS decks (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            self._import_legacy_json()
+        return self._conn
+
+    def _import_legacy_json(self):
+        """
+        One-time import of the old whole-file decks.json store, if present.
+
+        The file is renamed to decks.json.imported afterwards, so decks deleted
+        later (or a clear()) are not brought back on the next start.
+        """
+        legacy_file = os.path.join(os.path.dirname(self.storage_file), "decks.json")
+        if not os.path.exists(legacy_file):
+            return
+        try:
+            # A non-empty table means an earlier version already imported the file
+            if not self._conn.execute("SELECT 1 FROM decks LIMIT 1").fetchone():
+                with open(legacy_file, 'rb') as f:
+                    data = json_compat.loads(f.read())
+                self._write_rows(data.items())
+                logger.info(f"Imported {len(data)} decks from {legacy_file}")
+            os.replace(legacy_file, legacy_file + ".imported")
+        except Exception as e:
+            logger.error(f"Error importing legacy storage file: {e}")
+
+    def _write_rows(self, items):
+        """Upsert (deck_id, deck_data) pairs in one transaction (callers hold the lock)."""
+        with self._conn:
+            # ON CONFLICT ... DO UPDATE keeps the rowid, so load() preserves creation order
+            self._conn.executemany(
+                "INSERT INTO decks (id, data) VALUES (?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                [(deck_id, json_compat.dumps(deck)) for deck_id, deck in items]
+            )
+
     def load(self) -> Dict[str, Any]:
         """
-        Load deck data from JSON file.
+        Load deck data from the database.
 
         Returns:
             Dict containing all deck data
         """
         with self.lock:
-            if not os.path.exists(self.storage_file):
-                logger.info("Storage file not found, starting with empty storage")
-                return {}
-
             try:
-                with open(self.storage_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    logger.info(f"Loaded {len(data)} decks from storage")
-                    return data
-            except json.JSONDecodeError as e:
-                logger.error(f"Error decoding JSON from storage file: {e}")
-                return {}
+                rows = self._connect().execute("SELECT id, data FROM decks ORDER BY rowid").fetchall()
+                data = {deck_id: json_compat.loads(deck) for deck_id, deck in rows}
+                logger.info(f"Loaded {len(data)} decks from storage")
+                return data
             except Exception as e:
                 logger.error(f"Error loading storage: {e}")
                 return {}
 
-    def save(self, data: Dict[str, Any]):
+    def save_deck(self, deck_id: str, deck_data: Dict[str, Any]):
         """
-        Save deck data to JSON file.
+        Save a single deck's row.
 
         Args:
-            data: Dict containing all deck data
+            deck_id: The deck ID to save
+            deck_data: The deck's data
         """
         with self.lock:
             try:
-                # Create backup of existing file
-                if os.path.exists(self.storage_file):
-                    backup_file = f"{self.storage_file}.backup"
-                    try:
-                        with open(self.storage_file, 'r') as f:
-                            backup_data = f.read()
-                        with open(backup_file, 'w') as f:
-                            f.write(backup_data)
-                    except Exception as e:
-                        logger.warning(f"Failed to create backup: {e}")
-
-                # Save new data
-                with open(self.storage_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-
-                logger.debug(f"Saved {len(data)} decks to storage")
-
+                self._connect()
+                self._write_rows([(deck_id, deck_data)])
+                logger.debug(f"Saved deck {deck_id} to storage")
             except Exception as e:
-                logger.error(f"Error saving storage: {e}")
+                logger.error(f"Error saving deck {deck_id}: {e}")
                 raise
 
-    def update_deck(self, deck_id: str, deck_data: Dict[str, Any], all_data: Dict[str, Any]):
+    async def save_deck_async(self, deck_id: str, all_data: Dict[str, Any]):
+        """
+        Save a single deck without blocking the event loop.
+
+        The write runs in a worker thread on a snapshot taken when this
+        save's turn comes, so the live dict can keep changing meanwhile.
+
+        Args:
+            deck_id: The deck ID to save
+            all_data: Reference to the complete decks_storage dict
+        """
+        async with self._async_lock:
+            if deck_id not in all_data:
+                return
+            snapshot = dict(all_data[deck_id])
+            await asyncio.to_thread(self.save_deck, deck_id, snapshot)
+
+    async def update_deck(self, deck_id: str, deck_data: Dict[str, Any], all_data: Dict[str, Any]):
         """
-        Update a single deck and save to storage.
+        Update a single deck and save to storage (the write runs in a worker thread).
 
         Args:
             deck_id: The deck ID to update
@@ -96,27 +143,67 @@ class DeckStorage:
             all_data: Reference to the complete decks_storage dict
         """
         all_data[deck_id] = deck_data
-        self.save(all_data)
+        self._listing_cache.pop(deck_id, None)
+        await self.save_deck_async(deck_id, all_data)
 
-    def delete_deck(self, deck_id: str, all_data: Dict[str, Any]):
+    def _delete_row(self, deck_id: str):
+        with self.lock:
+            with self._connect():
+                self._conn.execute("DELETE FROM decks WHERE id = ?", (deck_id,))
+
+    async def delete_deck(self, deck_id: str, all_data: Dict[str, Any]):
         """
-        Delete a deck and save to storage.
+        Delete a deck and remove it from storage (the write runs in a worker thread).
 
         Args:
             deck_id: The deck ID to delete
             all_data: Reference to the complete decks_storage dict
         """
+        self._listing_cache.pop(deck_id, None)
         if deck_id in all_data:
             del all_data[deck_id]
-            self.save(all_data)
+            # Queued behind in-flight saves, so none of them can re-insert the row afterwards
+            async with self._async_lock:
+                await asyncio.to_thread(self._delete_row, deck_id)
             logger.info(f"Deleted deck {deck_id} from storage")
 
+    def list_summaries(self, all_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Build the /decks listing.
+
+        The request-derived fields are shaped once per deck and cached; only
+        status/progress/error, which change during generation, are read per call.
+
+        Args:
+            all_data: Reference to the complete decks_storage dict
+        """
+        summaries = []
+        for deck_id, deck_data in all_data.items():
+            static = self._listing_cache.get(deck_id)
+            if static is None:
+                request = deck_data.get("request", {})
+                static = self._listing_cache[deck_id] = {
+                    "prompt": request.get("prompt", "Unknown"),
+                    "slideCount": request.get("slideCount", 0),
+                    "template": request.get("template", "corporate"),
+                    "createdAt": deck_data.get("createdAt", None),
+                }
+            summaries.append({
+                "deckId": deck_data["deckId"],
+                "status": deck_data["status"],
+                "progress": deck_data.get("progress", 0),
+                **static,
+                "error": deck_data.get("error")
+            })
+        return summaries
+
     def clear(self):
         """Clear all data from storage."""
         with self.lock:
             try:
-                if os.path.exists(self.storage_file):
-                    os.remove(self.storage_file)
+                with self._connect():
+                    self._conn.execute("DELETE FROM decks")
+                self._listing_cache.clear()
                 logger.info("Storage cleared")
             except Exception as e:
                 logger.error(f"Error clearing storage: {e}")
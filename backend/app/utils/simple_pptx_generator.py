@@ -8,27 +8,64 @@ from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.dml.color import RGBColor
 from pptx.enum.shapes import MSO_SHAPE
+from pptx.oxml.xmlchemy import OxmlElement
+from copy import deepcopy
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+import os
+from typing import List, Dict, Any, Optional, Tuple
+import hashlib
 import logging
-import requests
+import time
+import httpx
+from PIL import ExifTags, Image, ImageOps
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 import re
+from ..image_cache import IMAGE_CACHE_ENABLED, IMAGE_CACHE_TTL, image_cache
+from ..agents.base_agent import HTTP2_AVAILABLE
 
 logger = logging.getLogger(__name__)
 
 # 常量定义
 SLIDE_WIDTH = Inches(10)
 SLIDE_HEIGHT = Inches(5.625)  # 16:9
+ORIGIN = Inches(0)
+# 每张内容页都会用到的标题框位置和字号，只换算一次
+TITLE_BOX = (Inches(0.5), Inches(0.3), Inches(9), Inches(0.8))
+TITLE_FONT_SIZE = Pt(28)
 MAX_BULLET_CHARS = 80
 MAX_BULLETS = 6
 MAX_PARAGRAPH_CHARS = 600
+# 图片下载：共享连接池 + 并发下载
+IMAGE_POOL_CONNECTIONS = 16
+IMAGE_POOL_MAXSIZE = 32
+# 超过该宽度的下载图片先缩小再嵌入（幻灯片宽10英寸，1920px已足够清晰）
+MAX_IMAGE_WIDTH = 1920
+IMAGE_JPEG_QUALITY = 85
 
 
 class SimplePPTXGenerator:
     """直接从JSON内容生成PPTX，支持多样化布局"""
     
     def __init__(self):
+        # 所有图片下载共用一个客户端，复用TCP/TLS连接；装了h2时同源图片走同一条HTTP/2连接
+        self._http = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            timeout=10,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=IMAGE_POOL_MAXSIZE,
+                                max_keepalive_connections=IMAGE_POOL_CONNECTIONS)
+        )
+        
+        # 只由layout_type决定的布局 -> 渲染方法（其余布局还要看内容，见_create_slide）
+        self._layout_handlers = {
+            "section_divider": self._create_section_slide,
+            "two_column": self._create_two_column_slide,
+            "comparison": self._create_comparison_slide,
+            "quote": self._create_quote_slide,
+            "timeline": self._create_timeline_slide,
+        }
+        
         self.color_schemes = {
             "corporate": {
                 "primary": RGBColor(0, 51, 102),
@@ -86,9 +123,14 @@ class SimplePPTXGenerator:
         design_config: Dict[str, Any],
         output_path: Path,
         title: str,
-        template: str = "corporate"
+        template: str = "corporate",
+        images: Optional[Dict[str, bytes]] = None
     ) -> Path:
-        """从幻灯片数据直接生成PPTX"""
+        """
+        从幻灯片数据直接生成PPTX
+        images: 预先下载好的图片 (url -> bytes)，命中的图片不再在渲染时下载；
+                为None时在渲染前并发下载
+        """
         
         logger.info(f"开始生成PPTX: {title}")
         logger.info(f"  - 幻灯片数量: {len(slides_data)}")
@@ -99,17 +141,29 @@ class SimplePPTXGenerator:
         prs.slide_height = SLIDE_HEIGHT
         
         colors = self._get_colors(design_config, template)
+        if images is None:
+            # 调用方没有预取时，先并发下载所有图片，渲染循环里不再逐张阻塞下载
+            images = self.fetch_images(self._collect_image_urls(slides_data))
+        else:
+            images = dict(images)
         
         for idx, slide_data in enumerate(slides_data, 1):
             try:
-                self._create_slide(prs, slide_data, colors, idx, template)
+                self._create_slide(prs, slide_data, colors, idx, template, images)
                 if idx % 5 == 0:
                     logger.info(f"  已创建 {idx}/{len(slides_data)} 张幻灯片")
             except Exception as e:
                 logger.error(f"  创建幻灯片 {idx} 失败: {e}")
                 self._create_error_slide(prs, idx, str(e), colors)
         
-        prs.save(str(output_path))
+        # 先在内存中打包，再一次性写盘（临时文件+重命名，不会留下写了一半的文件）
+        buf = BytesIO()
+        prs.save(buf)
+        output_path = Path(output_path)
+        tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(buf.getbuffer())
+        os.replace(tmp_path, output_path)
         logger.info(f"PPTX生成完成: {output_path}")
         return output_path
     
@@ -152,10 +206,11 @@ class SimplePPTXGenerator:
     
     def _has_content(self, slide_data: Dict[str, Any]) -> bool:
         """检查幻灯片是否有实际内容"""
-        content = slide_data.get("content", [])
-        paragraph = slide_data.get("paragraph", "")
-        table = slide_data.get("table", {})
-        image_url = slide_data.get("image_url", "")
+        # model_dump()出来的字段可能是None
+        content = slide_data.get("content") or []
+        paragraph = slide_data.get("paragraph") or ""
+        table = slide_data.get("table") or {}
+        image_url = slide_data.get("image_url") or ""
         
         # 检查paragraph是否有实质内容（至少30个字符）
         has_paragraph = paragraph and len(paragraph.strip()) >= 30
@@ -170,8 +225,117 @@ class SimplePPTXGenerator:
         
         return has_real_content or has_paragraph or bool(table.get("headers")) or bool(image_url)
     
+    def close(self):
+        """关闭图片下载用的连接池（应用关闭时调用）"""
+        self._http.close()
+    
+    def fetch_image(self, url: str) -> Optional[bytes]:
+        """
+        下载图片，非200返回None（网络异常直接抛出，由调用方处理）
+        开启IMAGE_CACHE时先查磁盘缓存；缓存过期后带ETag/Last-Modified做条件请求，304时沿用缓存
+        """
+        cached = image_cache.get(url) if IMAGE_CACHE_ENABLED else None
+        headers = {}
+        if cached:
+            data, etag, last_modified, fetched = cached
+            if time.time() - fetched < IMAGE_CACHE_TTL:
+                return data
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        
+        response = self._http.get(url, headers=headers)
+        if cached and response.status_code == 304:
+            image_cache.mark_fresh(url)
+            return cached[0]
+        if response.status_code != 200:
+            return None
+        data = self._downsample_image(response.content)
+        if IMAGE_CACHE_ENABLED:
+            image_cache.put(url, data, response.headers.get("ETag"),
+                            response.headers.get("Last-Modified"))
+        return data
+    
+    @staticmethod
+    def _downsample_image(data: bytes) -> bytes:
+        """
+        超宽图片按EXIF方向摆正后缩到MAX_IMAGE_WIDTH；JPEG重新编码为JPEG，其余格式存为PNG（不引入有损压缩）。
+        带透明通道或无法识别的图片原样返回
+        """
+        try:
+            with Image.open(BytesIO(data)) as img:
+                source_format = img.format
+                # EXIF方向5-8表示图片存储时横竖对调，按显示方向判断宽度
+                rotated = img.getexif().get(ExifTags.Base.Orientation, 1) in (5, 6, 7, 8)
+                width, height = (img.height, img.width) if rotated else img.size
+                if width <= MAX_IMAGE_WIDTH:
+                    return data
+                if img.mode in ("RGBA", "LA") or "transparency" in img.info:
+                    return data
+                target = (MAX_IMAGE_WIDTH, height * MAX_IMAGE_WIDTH // width)
+                # JPEG可在解码时直接按1/2、1/4、1/8缩小，省去全尺寸解码（draft按存储方向）
+                img.draft("RGB", target[::-1] if rotated else target)
+                # 重新编码会丢掉EXIF，先把方向应用到像素上，否则相机照片会被转歪
+                img = ImageOps.exif_transpose(img)
+                img.thumbnail(target, Image.LANCZOS)
+                out = BytesIO()
+                if source_format == "JPEG":
+                    img.convert("RGB").save(out, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+                else:
+                    # 截图、示意图等保持无损
+                    img.save(out, format="PNG", optimize=True)
+        except Exception as e:
+            logger.debug(f"图片缩放跳过: {e}")
+            return data
+        logger.debug(f"图片已缩小: {len(data)} -> {out.tell()} bytes")
+        return out.getvalue()
+    
+    def fetch_images(self, urls: List[str]) -> Dict[str, bytes]:
+        """并发下载多张图片 (url -> bytes)，失败的图片不放入结果，渲染时会再尝试一次"""
+        if not urls:
+            return {}
+        
+        def fetch(url):
+            try:
+                return self.fetch_image(url)
+            except Exception as e:
+                logger.debug(f"图片预取失败 {url}: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=min(IMAGE_POOL_MAXSIZE, len(urls))) as executor:
+            results = list(executor.map(fetch, urls))
+        
+        # 内容相同的图片（不同URL）只保留一份bytes
+        by_hash: Dict[bytes, bytes] = {}
+        return {
+            url: by_hash.setdefault(hashlib.sha256(data).digest(), data)
+            for url, data in zip(urls, results) if data
+        }
+    
+    def _collect_image_urls(self, slides_data: List[Dict[str, Any]]) -> List[str]:
+        """收集渲染时真正会嵌入的远程图片URL（去重，保持顺序）"""
+        urls = {}
+        for slide_data in slides_data:
+            kind, _ = self._route_slide(slide_data)
+            if kind == "title" and slide_data.get("background_image_url"):
+                urls[slide_data["background_image_url"]] = None
+            elif kind == "image" and slide_data.get("image_url"):
+                urls[slide_data["image_url"]] = None
+        return [url for url in urls if url.startswith("http")]
+    
+    def _load_image(self, url: str, images: Dict[str, bytes]) -> Optional[BytesIO]:
+        """优先使用预取的图片，未命中时再下载并记下，同一URL在后续幻灯片中不再重复下载"""
+        data = images.get(url)
+        if data is None:
+            data = self.fetch_image(url)
+            if data:
+                images[url] = data
+        return BytesIO(data) if data else None
+    
     def _create_slide(self, prs: Presentation, slide_data: Dict[str, Any], 
-                      colors: Dict[str, RGBColor], slide_number: int, template: str):
+                      colors: Dict[str, RGBColor], slide_number: int, template: str,
+                      images: Dict[str, bytes]):
         """创建单张幻灯片，根据layout_type选择布局"""
         
         slide_type = slide_data.get("slideType", "content")
@@ -182,55 +346,76 @@ class SimplePPTXGenerator:
                    f"has_paragraph={bool(slide_data.get('paragraph'))}, "
                    f"content_len={len(slide_data.get('content', []))}")
         
-        # 对于 narrative 布局，不强制改成 bullet_points，让 _create_narrative_slide 处理 fallback
-        # 只对非 narrative 布局检查内容并使用兜底
-        if slide_type != "title" and layout_type != "narrative" and not self._has_content(slide_data):
+        # 先按原始内容选好布局，再填兜底内容
+        kind, layout_type = self._route_slide(slide_data)
+        if self._is_empty_slide(slide_data):
             logger.warning(f"幻灯片 {slide_number} 内容为空，使用兜底内容")
             title = slide_data.get("title", "")
             slide_data["content"] = self._generate_fallback_content(title)
-            layout_type = "bullet_points"
         
-        # 优先检查是否有图表 - 有图表的幻灯片优先使用图表布局
-        has_chart = slide_data.get("chart_url") and Path(slide_data.get("chart_url", "")).exists()
-        
-        # Helper functions to check if table/image have actual content
-        def has_valid_table(data):
-            table = data.get("table")
-            if not table:
-                return False
-            headers = table.get("headers", [])
-            rows = table.get("rows", [])
-            return bool(headers) and bool(rows)
-        
-        def has_valid_image(data):
-            url = data.get("image_url")
-            return bool(url) and len(url.strip()) > 0
-        
-        if slide_type == "title":
-            self._create_title_slide(prs, slide_data, colors, template)
-        elif has_chart:
-            # 有图表时优先显示图表
+        if kind == "title":
+            self._create_title_slide(prs, slide_data, colors, template, images)
+        elif kind == "chart":
             self._create_chart_slide(prs, slide_data, colors)
-        elif layout_type == "section_divider":
-            self._create_section_slide(prs, slide_data, colors)
-        elif layout_type == "two_column":
-            self._create_two_column_slide(prs, slide_data, colors)
-        elif layout_type == "comparison":
-            self._create_comparison_slide(prs, slide_data, colors)
-        elif layout_type == "quote":
-            self._create_quote_slide(prs, slide_data, colors)
-        elif layout_type == "timeline":
-            self._create_timeline_slide(prs, slide_data, colors)
-        elif layout_type == "narrative" or slide_data.get("paragraph"):
-            # narrative 优先级提高，因为 table 和 image 可能是空壳
+        elif kind == "layout":
+            self._layout_handlers[layout_type](prs, slide_data, colors)
+        elif kind == "narrative":
             self._create_narrative_slide(prs, slide_data, colors)
-        elif layout_type == "table_data" or has_valid_table(slide_data):
+        elif kind == "table":
             self._create_table_slide(prs, slide_data, colors)
-        elif layout_type == "image_content" or has_valid_image(slide_data):
-            self._create_image_text_slide(prs, slide_data, colors)
+        elif kind == "image":
+            self._create_image_text_slide(prs, slide_data, colors, images)
         else:
             self._create_bullet_slide(prs, slide_data, colors)
     
+    def _route_slide(self, slide_data: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        决定幻灯片用哪种页面渲染，返回 (页面类型, layout_type)。
+        _create_slide 和图片预取共用这套判断，保证只下载渲染时真正会嵌入的图片。
+        """
+        layout_type = slide_data.get("layout_type", "bullet_points")
+        
+        if slide_data.get("slideType", "content") == "title":
+            return "title", layout_type
+        if self._is_empty_slide(slide_data):
+            layout_type = "bullet_points"
+        
+        # 优先检查是否有图表 - 有图表的幻灯片优先使用图表布局
+        if slide_data.get("chart_url") and Path(slide_data.get("chart_url", "")).exists():
+            return "chart", layout_type
+        if layout_type in self._layout_handlers:
+            return "layout", layout_type
+        if layout_type == "narrative" or slide_data.get("paragraph"):
+            # narrative 优先级提高，因为 table 和 image 可能是空壳
+            return "narrative", layout_type
+        if layout_type == "table_data" or self._has_valid_table(slide_data):
+            return "table", layout_type
+        if layout_type == "image_content" or self._has_valid_image(slide_data):
+            return "image", layout_type
+        return "bullets", layout_type
+    
+    def _is_empty_slide(self, slide_data: Dict[str, Any]) -> bool:
+        """内容为空、需要兜底内容的非标题页"""
+        # 对于 narrative 布局，不强制改成 bullet_points，让 _create_narrative_slide 处理 fallback
+        # 只对非 narrative 布局检查内容并使用兜底
+        return (slide_data.get("slideType", "content") != "title"
+                and slide_data.get("layout_type", "bullet_points") != "narrative"
+                and not self._has_content(slide_data))
+    
+    @staticmethod
+    def _has_valid_table(slide_data: Dict[str, Any]) -> bool:
+        """表格是否有表头和数据行"""
+        table = slide_data.get("table")
+        if not table:
+            return False
+        return bool(table.get("headers")) and bool(table.get("rows"))
+    
+    @staticmethod
+    def _has_valid_image(slide_data: Dict[str, Any]) -> bool:
+        """是否有非空的图片URL"""
+        url = slide_data.get("image_url")
+        return bool(url) and len(url.strip()) > 0
+    
     def _generate_fallback_content(self, title: str) -> List[str]:
         """根据标题生成兜底内容"""
         if not title:
@@ -248,18 +433,19 @@ class SimplePPTXGenerator:
         ]
     
     def _create_title_slide(self, prs: Presentation, slide_data: Dict[str, Any],
-                            colors: Dict[str, RGBColor], template: str):
+                            colors: Dict[str, RGBColor], template: str,
+                            images: Dict[str, bytes]):
         """创建主标题页 - 唯一允许背景图的页面"""
         slide = prs.slides.add_slide(prs.slide_layouts[6])
         
         # 只有标题页才添加背景图
         bg_url = slide_data.get("background_image_url")
         if bg_url:
-            self._add_background_image(slide, bg_url)
+            self._add_background_image(slide, bg_url, images)
         
         # 半透明遮罩
         overlay = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE, Inches(0), Inches(0), SLIDE_WIDTH, SLIDE_HEIGHT
+            MSO_SHAPE.RECTANGLE, ORIGIN, ORIGIN, SLIDE_WIDTH, SLIDE_HEIGHT
         )
         overlay.fill.solid()
         overlay.fill.fore_color.rgb = RGBColor(0, 0, 0)
@@ -295,7 +481,7 @@ class SimplePPTXGenerator:
         
         # 背景色块
         bg_shape = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE, Inches(0), Inches(0), SLIDE_WIDTH, SLIDE_HEIGHT
+            MSO_SHAPE.RECTANGLE, ORIGIN, ORIGIN, SLIDE_WIDTH, SLIDE_HEIGHT
         )
         bg_shape.fill.solid()
         bg_shape.fill.fore_color.rgb = colors["primary"]
@@ -323,15 +509,8 @@ class SimplePPTXGenerator:
             points_box = slide.shapes.add_textbox(Inches(1), Inches(3.6), Inches(8), Inches(1.5))
             tf = points_box.text_frame
             tf.word_wrap = True
-            for i, point in enumerate(content[:4]):
-                if i == 0:
-                    p = tf.paragraphs[0]
-                else:
-                    p = tf.add_paragraph()
-                p.text = "• " + self._truncate_text(point, 60)
-                p.font.size = Pt(18)
-                p.font.color.rgb = colors["white"]
-                p.space_before = Pt(6)
+            self._add_paragraphs(tf, ["• " + self._truncate_text(point, 60) for point in content[:4]],
+                                 Pt(18), colors["white"], space_before=Pt(6))
     
     def _create_bullet_slide(self, prs: Presentation, slide_data: Dict[str, Any],
                              colors: Dict[str, RGBColor]):
@@ -351,17 +530,8 @@ class SimplePPTXGenerator:
         tf = body_box.text_frame
         tf.word_wrap = True
         
-        for i, point in enumerate(content[:MAX_BULLETS]):
-            if i == 0:
-                p = tf.paragraphs[0]
-            else:
-                p = tf.add_paragraph()
-            text = self._truncate_text(point, MAX_BULLET_CHARS)
-            p.text = "• " + text
-            p.font.size = Pt(font_size)
-            p.font.color.rgb = colors["text"]
-            p.space_before = Pt(8)
-            p.space_after = Pt(4)
+        self._add_paragraphs(tf, ["• " + self._truncate_text(point, MAX_BULLET_CHARS) for point in content[:MAX_BULLETS]],
+                             Pt(font_size), colors["text"], space_before=Pt(8), space_after=Pt(4))
     
     def _create_two_column_slide(self, prs: Presentation, slide_data: Dict[str, Any],
                                   colors: Dict[str, RGBColor]):
@@ -375,20 +545,15 @@ class SimplePPTXGenerator:
         
         for item in content:
             if item.startswith("LEFT:"):
-                left_items.append(item.replace("LEFT:", "").strip())
+                left_items.append(item[5:].strip())
             elif item.startswith("RIGHT:"):
-                right_items.append(item.replace("RIGHT:", "").strip())
+                right_items.append(item[6:].strip())
             else:
                 if len(left_items) <= len(right_items):
                     left_items.append(item)
                 else:
                     right_items.append(item)
         
-        if not left_items and not right_items and content:
-            mid = len(content) // 2
-            left_items = content[:mid]
-            right_items = content[mid:]
-        
         # 左栏
         left_box = slide.shapes.add_textbox(Inches(0.5), Inches(1.3), Inches(4.3), Inches(3.8))
         self._fill_column(left_box, left_items, colors)
@@ -409,16 +574,8 @@ class SimplePPTXGenerator:
         """填充栏目内容"""
         tf = textbox.text_frame
         tf.word_wrap = True
-        for i, item in enumerate(items[:5]):
-            if i == 0:
-                p = tf.paragraphs[0]
-            else:
-                p = tf.add_paragraph()
-            text = self._truncate_text(item, 50)
-            p.text = "• " + text
-            p.font.size = Pt(14)
-            p.font.color.rgb = colors["text"]
-            p.space_before = Pt(6)
+        self._add_paragraphs(tf, ["• " + self._truncate_text(item, 50) for item in items[:5]],
+                             Pt(14), colors["text"], space_before=Pt(6))
     
     def _create_comparison_slide(self, prs: Presentation, slide_data: Dict[str, Any],
                                   colors: Dict[str, RGBColor]):
@@ -444,6 +601,9 @@ class SimplePPTXGenerator:
         
         content = slide_data.get("content", [])
         mid = len(content) // 2
+        item_size, item_color, item_space = Pt(13), colors["text"], Pt(6)
+        left_items = ["✓ " + self._truncate_text(item, 40) for item in content[:min(mid, 4)]]
+        right_items = ["✓ " + self._truncate_text(item, 40) for item in content[mid:mid + 4]]
         
         # 左侧内容
         left_text = slide.shapes.add_textbox(Inches(0.7), Inches(1.6), Inches(3.9), Inches(3.3))
@@ -455,12 +615,7 @@ class SimplePPTXGenerator:
         p.font.bold = True
         p.font.color.rgb = colors["primary"]
         
-        for item in content[:mid][:4]:
-            p = tf.add_paragraph()
-            p.text = "✓ " + self._truncate_text(item, 40)
-            p.font.size = Pt(13)
-            p.font.color.rgb = colors["text"]
-            p.space_before = Pt(6)
+        self._add_paragraphs(tf, left_items, item_size, item_color, space_before=item_space, append=True)
         
         # 右侧内容
         right_text = slide.shapes.add_textbox(Inches(5.4), Inches(1.6), Inches(3.9), Inches(3.3))
@@ -472,12 +627,7 @@ class SimplePPTXGenerator:
         p.font.bold = True
         p.font.color.rgb = colors["secondary"]
         
-        for item in content[mid:][:4]:
-            p = tf.add_paragraph()
-            p.text = "✓ " + self._truncate_text(item, 40)
-            p.font.size = Pt(13)
-            p.font.color.rgb = colors["text"]
-            p.space_before = Pt(6)
+        self._add_paragraphs(tf, right_items, item_size, item_color, space_before=item_space, append=True)
         
         # VS标识
         vs_shape = slide.shapes.add_shape(MSO_SHAPE.OVAL, Inches(4.6), Inches(2.7), Inches(0.7), Inches(0.7))
@@ -559,40 +709,47 @@ class SimplePPTXGenerator:
         line.line.fill.background()
         
         spacing = 8.5 / max(num_items - 1, 1)
+        date_size, desc_size = Pt(12), Pt(10)
+        # 每个节点相同的尺寸和纵向位置，循环外换算一次
+        dot_offset, dot_size = Inches(0.1), Inches(0.25)
+        date_offset, date_y, date_w, date_h = Inches(0.5), timeline_y - Inches(0.7), Inches(1.2), Inches(0.5)
+        desc_offset, desc_y, desc_w, desc_h = Inches(0.6), timeline_y + Inches(0.3), Inches(1.4), Inches(1.2)
         
         for i, item in enumerate(content[:num_items]):
             x = Inches(0.75 + i * spacing)
             
             # 圆点
             dot = slide.shapes.add_shape(
-                MSO_SHAPE.OVAL, x - Inches(0.1), timeline_y - Inches(0.1), Inches(0.25), Inches(0.25)
+                MSO_SHAPE.OVAL, x - dot_offset, timeline_y - dot_offset, dot_size, dot_size
             )
             dot.fill.solid()
             dot.fill.fore_color.rgb = colors["accent"]
             dot.line.fill.background()
             
-            parts = item.split(":", 1) if ":" in item else [f"Step {i+1}", item]
-            date = parts[0].strip()
-            desc = parts[1].strip() if len(parts) > 1 else ""
+            key, sep, value = item.partition(":")
+            if sep:
+                date, desc = key.strip(), value.strip()
+            else:
+                date, desc = f"Step {i+1}", item.strip()
             
             # 日期标签
-            date_box = slide.shapes.add_textbox(x - Inches(0.5), timeline_y - Inches(0.7), Inches(1.2), Inches(0.5))
+            date_box = slide.shapes.add_textbox(x - date_offset, date_y, date_w, date_h)
             tf = date_box.text_frame
             p = tf.paragraphs[0]
             p.text = date
-            p.font.size = Pt(12)
+            p.font.size = date_size
             p.font.bold = True
             p.font.color.rgb = colors["primary"]
             p.alignment = PP_ALIGN.CENTER
             
             # 描述
             if desc:
-                desc_box = slide.shapes.add_textbox(x - Inches(0.6), timeline_y + Inches(0.3), Inches(1.4), Inches(1.2))
+                desc_box = slide.shapes.add_textbox(x - desc_offset, desc_y, desc_w, desc_h)
                 tf = desc_box.text_frame
                 tf.word_wrap = True
                 p = tf.paragraphs[0]
                 p.text = self._truncate_text(desc, 40)
-                p.font.size = Pt(10)
+                p.font.size = desc_size
                 p.font.color.rgb = colors["text"]
                 p.alignment = PP_ALIGN.CENTER
     
@@ -643,7 +800,7 @@ class SimplePPTXGenerator:
         p.line_spacing = 1.5
     
     def _create_image_text_slide(self, prs: Presentation, slide_data: Dict[str, Any],
-                                  colors: Dict[str, RGBColor]):
+                                  colors: Dict[str, RGBColor], images: Dict[str, bytes]):
         """创建图文混排页"""
         slide = prs.slides.add_slide(prs.slide_layouts[6])
         self._add_slide_title(slide, slide_data.get("title", ""), colors)
@@ -653,9 +810,8 @@ class SimplePPTXGenerator:
         if image_url:
             try:
                 if image_url.startswith("http"):
-                    response = requests.get(image_url, timeout=10)
-                    if response.status_code == 200:
-                        image_bytes = BytesIO(response.content)
+                    image_bytes = self._load_image(image_url, images)
+                    if image_bytes:
                         slide.shapes.add_picture(image_bytes, Inches(0.5), Inches(1.3), width=Inches(4.5), height=Inches(3.5))
                 elif Path(image_url).exists():
                     slide.shapes.add_picture(image_url, Inches(0.5), Inches(1.3), width=Inches(4.5), height=Inches(3.5))
@@ -672,15 +828,8 @@ class SimplePPTXGenerator:
         tf = text_box.text_frame
         tf.word_wrap = True
         
-        for i, point in enumerate(content[:5]):
-            if i == 0:
-                p = tf.paragraphs[0]
-            else:
-                p = tf.add_paragraph()
-            p.text = "• " + self._truncate_text(point, 50)
-            p.font.size = Pt(14)
-            p.font.color.rgb = colors["text"]
-            p.space_before = Pt(8)
+        self._add_paragraphs(tf, ["• " + self._truncate_text(point, 50) for point in content[:5]],
+                             Pt(14), colors["text"], space_before=Pt(8))
     
     def _create_table_slide(self, prs: Presentation, slide_data: Dict[str, Any],
                             colors: Dict[str, RGBColor]):
@@ -708,6 +857,7 @@ class SimplePPTXGenerator:
             rows_count, cols_count, Inches(0.5), Inches(1.4), Inches(9), Inches(min(3.5, 0.5 * rows_count))
         )
         table = table_shape.table
+        header_size, cell_size = Pt(12), Pt(11)
         
         for col_idx, header in enumerate(headers):
             cell = table.rows[0].cells[col_idx]
@@ -717,7 +867,7 @@ class SimplePPTXGenerator:
             tf = cell.text_frame
             tf.paragraphs[0].font.color.rgb = colors["white"]
             tf.paragraphs[0].font.bold = True
-            tf.paragraphs[0].font.size = Pt(12)
+            tf.paragraphs[0].font.size = header_size
             tf.paragraphs[0].alignment = PP_ALIGN.CENTER
         
         for row_idx, row_data in enumerate(rows, 1):
@@ -725,7 +875,7 @@ class SimplePPTXGenerator:
                 cell = table.rows[row_idx].cells[col_idx]
                 cell.text = str(cell_data)[:25]
                 tf = cell.text_frame
-                tf.paragraphs[0].font.size = Pt(11)
+                tf.paragraphs[0].font.size = cell_size
                 tf.paragraphs[0].font.color.rgb = colors["text"]
                 tf.paragraphs[0].alignment = PP_ALIGN.CENTER
     
@@ -762,23 +912,42 @@ class SimplePPTXGenerator:
             p.line_spacing = 1.4
         elif content:
             # 如果有bullet points，显示bullet列表
-            for i, point in enumerate(content[:5]):
-                if i == 0:
-                    p = tf.paragraphs[0]
-                else:
-                    p = tf.add_paragraph()
-                p.text = "• " + self._truncate_text(point, 60)
-                p.font.size = Pt(14)
-                p.font.color.rgb = colors["text"]
-                p.space_before = Pt(4)
+            self._add_paragraphs(tf, ["• " + self._truncate_text(point, 60) for point in content[:5]],
+                                 Pt(14), colors["text"], space_before=Pt(4))
+    
+    def _add_paragraphs(self, tf, texts: List[str], size, color: RGBColor,
+                        space_before=None, space_after=None, append: bool = False):
+        """
+        批量写入样式相同的段落
+        只有第一段通过python-pptx逐项设置样式，其余段落复制它的pPr并直接构造<a:p>，
+        避免每段重复走属性setter；append=True时接在已有段落之后
+        """
+        if not texts:
+            return
+        p = tf.add_paragraph() if append else tf.paragraphs[0]
+        p.text = texts[0]
+        p.font.size = size
+        p.font.color.rgb = color
+        if space_before is not None:
+            p.space_before = space_before
+        if space_after is not None:
+            p.space_after = space_after
+        
+        txBody = tf._txBody
+        pPr = p._p.pPr
+        for text in texts[1:]:
+            p_el = OxmlElement("a:p")
+            p_el.append(deepcopy(pPr))
+            p_el.append_text(text)
+            txBody.append(p_el)
     
     def _add_slide_title(self, slide, title: str, colors: Dict[str, RGBColor]):
         """添加幻灯片标题"""
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.3), Inches(9), Inches(0.8))
+        title_box = slide.shapes.add_textbox(*TITLE_BOX)
         tf = title_box.text_frame
         p = tf.paragraphs[0]
         p.text = self._truncate_text(title, 60)
-        p.font.size = Pt(28)
+        p.font.size = TITLE_FONT_SIZE
         p.font.bold = True
         p.font.color.rgb = colors["primary"]
     
@@ -788,26 +957,17 @@ class SimplePPTXGenerator:
         tf = body_box.text_frame
         tf.word_wrap = True
         
-        for i, point in enumerate(content[:MAX_BULLETS]):
-            if i == 0:
-                p = tf.paragraphs[0]
-            else:
-                p = tf.add_paragraph()
-            p.text = "• " + self._truncate_text(point, MAX_BULLET_CHARS)
-            p.font.size = Pt(16)
-            p.font.color.rgb = colors["text"]
-            p.space_before = Pt(6)
+        self._add_paragraphs(tf, ["• " + self._truncate_text(point, MAX_BULLET_CHARS) for point in content[:MAX_BULLETS]],
+                             Pt(16), colors["text"], space_before=Pt(6))
     
-    def _add_background_image(self, slide, bg_url: str):
+    def _add_background_image(self, slide, bg_url: str, images: Dict[str, bytes]):
         """添加背景图片 - 仅用于标题页"""
         try:
-            response = requests.get(bg_url, timeout=10)
-            if response.status_code == 200:
-                image_bytes = BytesIO(response.content)
-                pic = slide.shapes.add_picture(image_bytes, Inches(0), Inches(0), width=SLIDE_WIDTH, height=SLIDE_HEIGHT)
-                spTree = slide.shapes._spTree
-                spTree.remove(pic._element)
-                spTree.insert(2, pic._element)
+            image_bytes = self._load_image(bg_url, images)
+            if image_bytes:
+                pic = slide.shapes.add_picture(image_bytes, ORIGIN, ORIGIN, width=SLIDE_WIDTH, height=SLIDE_HEIGHT)
+                # 移到最底层（nvGrpSpPr、grpSpPr之后）；lxml的insert会直接移动已有节点，无需先remove
+                slide.shapes._spTree.insert(2, pic._element)
                 logger.info("  添加背景图片成功")
         except Exception as e:
             logger.warning(f"  背景图片加载失败: {e}")
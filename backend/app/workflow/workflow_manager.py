@@ -1,4 +1,4 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from ..agents.outline_agent import OutlineAgent
 from ..agents.content_agent import ContentAgent
 from ..agents.design_agent import DesignAgent
@@ -10,13 +10,23 @@ from ..agents.layout_adjustment_agent import LayoutAdjustmentAgent
 from ..agents.chart_agent import ChartAgent
 from ..utils.simple_pptx_generator import SimplePPTXGenerator
 from ..models import DeckRequest, SlideContent
+from .. import json_compat
 from pathlib import Path
 from datetime import datetime
-import json
+import asyncio
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+
+def _write_json(filepath: Path, data: Any) -> None:
+    """Encode once and write in a single call; the temp file + rename never leaves a half-written file."""
+    tmp_path = filepath.with_suffix(filepath.suffix + ".tmp")
+    tmp_path.write_bytes(json_compat.dumps_bytes(data, indent=True))
+    os.replace(tmp_path, filepath)
+
+
 class WorkflowManager:
     """
     Manages the sophisticated PPT generation workflow.
@@ -60,88 +70,128 @@ class WorkflowManager:
                          self.contents_dir, self.pptx_dir]:
             dir_path.mkdir(parents=True, exist_ok=True)
     
-    async def execute_workflow(self, deck_id: str, request: DeckRequest, storage: Dict[str, Any]) -> tuple[List[SlideContent], Dict[str, Any]]:
+    def close(self):
+        """Release the PPTX generator's image download pool (called on app shutdown)."""
+        self.pptx_generator.close()
+    
+    async def execute_workflow(self, deck_id: str, request: DeckRequest, storage: Dict[str, Any]) -> tuple[List[SlideContent], Dict[str, Any], Path]:
         """
         Execute the complete generation workflow.
-        Returns: (slides, design_config)
+        Returns: (slides, design_config, pptx_path)
         """
         
-        # Step 1: 大纲 - Strategic Outline Creation
-        await self._update_progress(storage, deck_id, "outline", 10, "📋 Creating strategic outline structure...")
-        outline = await self.outline_agent.generate_outline(request)
+        # Artifact filename stem for this run ({deck_id}_{timestamp}), built once
+        run_id = f"{deck_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-        # Save outline to file
-        outline_file = self._save_outline(outline, deck_id)
-        logger.info(f"Saved outline to: {outline_file}")
+        # Background tasks started below; any still pending if a step raises are
+        # cancelled and awaited on the way out instead of being left running
+        tasks: List[asyncio.Task] = []
+        try:
+            # Design only depends on the request, so start it now and collect it at Step 7
+            design_task = asyncio.create_task(self.design_agent.generate_design(request))
+            tasks.append(design_task)
         
-        # Step 2: 权重布局 - Structure Analysis & Expansion
-        await self._update_progress(storage, deck_id, "analyze", 18, "⚖️ Analyzing structure and allocating slides by weight...")
-        slide_blueprints = self._expand_outline_to_slides(outline, request.slideCount)
+            # Step 1: 大纲 - Strategic Outline Creation
+            await self._update_progress(storage, deck_id, "outline", 10, "📋 Creating strategic outline structure...")
+            outline = await self.outline_agent.generate_outline(request)
         
-        # Save structure to file
-        structure_file = self._save_structure(slide_blueprints, outline.title, deck_id)
-        logger.info(f"Saved structure to: {structure_file}")
+            # Save outline to file (off the event loop)
+            outline_file = await asyncio.to_thread(self._save_outline, outline, run_id)
+            logger.info(f"Saved outline to: {outline_file}")
         
-        # Step 3: 内容生成 - Concurrent Content Development
-        await self._update_progress(storage, deck_id, "content", 30, f"✍️ Generating content for {len(slide_blueprints)} slides...")
-        detailed_slides = await self.content_agent.generate_all_content(slide_blueprints, request, outline.title)
+            # Step 2: 权重布局 - Structure Analysis & Expansion
+            await self._update_progress(storage, deck_id, "analyze", 18, "⚖️ Analyzing structure and allocating slides by weight...")
+            slide_blueprints = self._expand_outline_to_slides(outline, request.slideCount)
         
-        # Save content to files
-        content_files = self._save_contents(detailed_slides, deck_id)
-        logger.info(f"Saved {len(content_files)} content files")
+            # Save structure to file
+            structure_file = await asyncio.to_thread(self._save_structure, slide_blueprints, outline.title, run_id)
+            logger.info(f"Saved structure to: {structure_file}")
+        
+            # Step 3: 内容生成 - Concurrent Content Development
+            await self._update_progress(storage, deck_id, "content", 30, f"✍️ Generating content for {len(slide_blueprints)} slides...")
+            detailed_slides = await self.content_agent.generate_all_content(slide_blueprints, request, outline.title)
+        
+            # Serialize slides once: the same dicts are saved to files and fed to ChartAgent
+            slides_dict = [slide.model_dump() for slide in detailed_slides]
+        
+            # Save content to files (written before ChartAgent adds chart fields to the dicts)
+            content_files = await asyncio.to_thread(self._save_contents, slides_dict, run_id)
+            logger.info(f"Saved {len(content_files)} content files")
 
-        # Step 4: 图表生成 - Chart Generation for Data Visualization
-        await self._update_progress(storage, deck_id, "charts", 36, "📊 Generating charts for data visualization...")
-        slides_dict = [slide.dict() for slide in detailed_slides]
-        slides_with_charts = await self.chart_agent.suggest_charts_for_slides(
-            slides_dict,
-            request.template,
-            request.audience
-        )
-        # Update slides with chart data
-        for i, slide in enumerate(detailed_slides):
-            if i < len(slides_with_charts):
-                if "chart_url" in slides_with_charts[i]:
-                    slide.chart_url = slides_with_charts[i]["chart_url"]
-                if "chart_type" in slides_with_charts[i]:
-                    slide.chart_type = slides_with_charts[i]["chart_type"]
+            # Step 4: 图表生成 - Chart Generation for Data Visualization
+            # Charts only add chart_url/chart_type, which no step before Step 8 reads, so the
+            # chart LLM calls run concurrently with optimization, layout and image selection.
+            await self._update_progress(storage, deck_id, "charts", 36, "📊 Generating charts for data visualization...")
+            chart_task = asyncio.create_task(self.chart_agent.suggest_charts_for_slides(
+                slides_dict,
+                request.template,
+                request.audience
+            ))
+            tasks.append(chart_task)
 
-        # Step 5: Content Optimization
-        await self._update_progress(storage, deck_id, "optimize", 42, "🔧 Optimizing content for impact...")
-        optimized_content = await self._optimize_content(detailed_slides, request)
+            # Step 5: Content Optimization
+            await self._update_progress(storage, deck_id, "optimize", 42, "🔧 Optimizing content for impact...")
+            optimized_content = await self._optimize_content(detailed_slides, request)
 
-        # Step 6: Layout Selection (Using Manual KB)
-        await self._update_progress(storage, deck_id, "layout", 52, "📐 Selecting optimal layouts based on content analysis...")
-        laid_out_content = await self.layout_agent.assign_layouts_all(optimized_content)
+            # Step 6 + 7: Layout Selection (Using Manual KB) ∥ Background Images
+            # LayoutAgent only sets slide.layout and ImageAgent only sets image/background URLs,
+            # so both can run concurrently over the same slide objects.
+            await self._update_progress(storage, deck_id, "layout", 52, "📐 Selecting optimal layouts based on content analysis...")
+            laid_out_content, _ = await asyncio.gather(
+                self.layout_agent.assign_layouts_all(optimized_content),
+                self.image_agent.suggest_images(optimized_content, outline.title, request.template)
+            )
 
-        # Step 7: 背景嵌入 - Visual Design & Background Images
-        await self._update_progress(storage, deck_id, "design", 60, "🎨 Planning visual design and background images...")
-        design_config = await self.design_agent.generate_design(request)
-        laid_out_content = await self.image_agent.suggest_images(laid_out_content, outline.title, request.template)
+            # Update slides with chart data
+            slides_with_charts = await chart_task
+            for i, slide in enumerate(laid_out_content):
+                if i < len(slides_with_charts):
+                    if "chart_url" in slides_with_charts[i]:
+                        slide.chart_url = slides_with_charts[i]["chart_url"]
+                    if "chart_type" in slides_with_charts[i]:
+                        slide.chart_type = slides_with_charts[i]["chart_type"]
 
-        # Step 8: 图片搜索 - Find images for sparse slides (< 100 chars)
-        await self._update_progress(storage, deck_id, "images", 70, "🔍 Finding relevant images for sparse slides...")
-        laid_out_content = await self.image_search_agent.find_images_for_sparse_slides(
-            laid_out_content,
-            outline.title,
-            max_text_length=100
-        )
+            # Step 7: 背景嵌入 - Visual Design (started concurrently at the beginning)
+            await self._update_progress(storage, deck_id, "design", 60, "🎨 Planning visual design and background images...")
+            design_config = await design_task
 
-        # Step 9: 布局调整 - Validate & Adjust Layouts
-        await self._update_progress(storage, deck_id, "adjust", 80, "📏 Validating layout and adjusting text overflow...")
-        laid_out_content = self.layout_adjustment_agent.validate_and_adjust_all(laid_out_content)
+            # Step 8: 图片搜索 - Find images for sparse slides (< 100 chars)
+            await self._update_progress(storage, deck_id, "images", 70, "🔍 Finding relevant images for sparse slides...")
+            laid_out_content = await self.image_search_agent.find_images_for_sparse_slides(
+                laid_out_content,
+                outline.title,
+                max_text_length=100
+            )
 
-        # Step 10: 最终检查 - Final Review & Assembly
-        await self._update_progress(storage, deck_id, "review", 90, "✅ Final quality review and assembly...")
-        final_content = await self.review_agent.review_slides(laid_out_content, outline.title, request.audience)
-        
-        # Step 11: 生成PPTX - Generate PPTX directly from JSON
-        await self._update_progress(storage, deck_id, "generating", 95, "🎬 Generating PPTX file...")
-        pptx_path = self._generate_pptx(final_content, design_config, deck_id, outline.title, request.template)
-        
-        logger.info(f"✓ 工作流完成: {pptx_path}")
-        
-        return final_content, design_config
+            # Step 9: 布局调整 - Validate & Adjust Layouts
+            await self._update_progress(storage, deck_id, "adjust", 80, "📏 Validating layout and adjusting text overflow...")
+            laid_out_content = self.layout_adjustment_agent.validate_and_adjust_all(laid_out_content)
+
+            # The reviewer never edits image URLs, so the render step's image downloads
+            # can run while the review LLM call is in flight
+            images_task = asyncio.create_task(self._prefetch_images(laid_out_content))
+            tasks.append(images_task)
+
+            # Step 10: 最终检查 - Final Review & Assembly
+            await self._update_progress(storage, deck_id, "review", 90, "✅ Final quality review and assembly...")
+            final_content = await self.review_agent.review_slides(laid_out_content, outline.title, request.audience)
+            images = await images_task
+        
+            # Step 11: 生成PPTX - Generate PPTX directly from JSON
+            await self._update_progress(storage, deck_id, "generating", 95, "🎬 Generating PPTX file...")
+            # python-pptx rendering and the file write are blocking; keep them off the event loop
+            pptx_path = await asyncio.to_thread(
+                self._generate_pptx, final_content, design_config, run_id, outline.title, request.template, images
+            )
+        
+            logger.info(f"✓ 工作流完成: {pptx_path}")
+        
+            return final_content, design_config, pptx_path
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
     def _expand_outline_to_slides(self, outline, target_count: int) -> List[SlideContent]:
         """
@@ -354,6 +404,16 @@ class WorkflowManager:
         # Could add a ReviewAgent here for final quality checks
         return slides
     
+    async def _prefetch_images(self, slides: List[SlideContent]) -> Dict[str, bytes]:
+        """Download the slide images the PPTX generator will embed (url -> bytes)."""
+        # Same routing as rendering, so images of slides drawn as charts, tables,
+        # paragraphs etc. (which never embed them) are not downloaded
+        urls = self.pptx_generator._collect_image_urls([slide.model_dump() for slide in slides])
+        
+        # Fetched concurrently over the generator's pooled session; failed downloads
+        # are left out, so the generator retries them as before
+        return await asyncio.to_thread(self.pptx_generator.fetch_images, urls)
+    
     async def _update_progress(self, storage: Dict[str, Any], deck_id: str, 
                              status: str, progress: int, step: str):
         """Update workflow progress."""
@@ -365,10 +425,9 @@ class WorkflowManager:
     
     # ==================== 文件保存方法 ====================
     
-    def _save_outline(self, outline, deck_id: str) -> Path:
+    def _save_outline(self, outline, run_id: str) -> Path:
         """保存大纲到JSON文件"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"outline_{deck_id}_{timestamp}.json"
+        filename = f"outline_{run_id}.json"
         filepath = self.outlines_dir / filename
         
         outline_data = {
@@ -384,39 +443,34 @@ class WorkflowManager:
             ]
         }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(outline_data, f, indent=2, ensure_ascii=False)
+        _write_json(filepath, outline_data)
         
         return filepath
     
-    def _save_structure(self, slide_blueprints: List[SlideContent], title: str, deck_id: str) -> Path:
+    def _save_structure(self, slide_blueprints: List[SlideContent], title: str, run_id: str) -> Path:
         """保存幻灯片结构到JSON文件"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"structure_{deck_id}_{timestamp}.json"
+        filename = f"structure_{run_id}.json"
         filepath = self.structures_dir / filename
         
         structure_data = {
             "title": title,
             "total_slides": len(slide_blueprints),
-            "slides": [slide.dict() for slide in slide_blueprints]
+            "slides": [slide.model_dump() for slide in slide_blueprints]
         }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(structure_data, f, indent=2, ensure_ascii=False)
+        _write_json(filepath, structure_data)
         
         return filepath
     
-    def _save_contents(self, slides: List[SlideContent], deck_id: str) -> List[Path]:
+    def _save_contents(self, slides: List[Dict[str, Any]], run_id: str) -> List[Path]:
         """保存每张幻灯片的内容到单独的JSON文件"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         saved_files = []
         
         for idx, slide in enumerate(slides, 1):
-            filename = f"content_{deck_id}_{timestamp}_slide{idx:03d}.json"
+            filename = f"content_{run_id}_slide{idx:03d}.json"
             filepath = self.contents_dir / filename
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(slide.dict(), f, indent=2, ensure_ascii=False)
+            _write_json(filepath, slide)
             
             saved_files.append(filepath)
         
@@ -426,13 +480,13 @@ class WorkflowManager:
         self,
         slides: List[SlideContent],
         design_config: Dict[str, Any],
-        deck_id: str,
+        run_id: str,
         title: str,
-        template: str
+        template: str,
+        images: Optional[Dict[str, bytes]] = None
     ) -> Path:
         """生成最终的PPTX文件"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"presentation_{deck_id}_{timestamp}.pptx"
+        filename = f"presentation_{run_id}.pptx"
         filepath = self.pptx_dir / filename
         
         logger.info(f"开始生成PPTX: {title}")
@@ -441,7 +495,7 @@ class WorkflowManager:
         logger.info(f"  - 输出路径: {filepath}")
         
         # 转换SlideContent列表为字典列表
-        slides_data = [slide.dict() for slide in slides]
+        slides_data = [slide.model_dump() for slide in slides]
         
         # 使用SimplePPTXGenerator生成PPTX
         result_path = self.pptx_generator.generate_pptx(
@@ -449,7 +503,8 @@ class WorkflowManager:
             design_config=design_config,
             output_path=filepath,
             title=title,
-            template=template
+            template=template,
+            images=images
         )
         
         logger.info(f"✓ PPTX生成完成: {result_path}")